@@ -0,0 +1,36 @@
+"""sent reminders ledger
+
+Revision ID: 0a8d3f5b7c61
+Revises: f7c9e1a3b524
+Create Date: 2026-10-18 20:15:37.684209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a8d3f5b7c61'
+down_revision = 'f7c9e1a3b524'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sent_reminders',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('due_period', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'quiz_id', 'due_period')
+    )
+    # Pairs that are already overdue were reminded by the old daily job
+    op.execute(
+        "INSERT INTO sent_reminders (user_id, quiz_id, due_period) "
+        "SELECT user_id, quiz_id, next_due_at FROM quiz_due WHERE next_due_at <= timezone('UTC', now())"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sent_reminders')
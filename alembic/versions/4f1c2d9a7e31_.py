@@ -0,0 +1,42 @@
+"""quiz answers history
+
+Revision ID: 4f1c2d9a7e31
+Revises: ea8b7988c201
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2d9a7e31'
+down_revision = 'ea8b7988c201'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('quiz_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quiz_result_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('option_id', sa.Integer(), nullable=False),
+    sa.Column('question', sa.String(), nullable=False),
+    sa.Column('option', sa.String(), nullable=False),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['quiz_result_id'], ['quiz_results.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quiz_answers_company_id_timestamp_id', 'quiz_answers', ['company_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_quiz_answers_user_id_timestamp_id', 'quiz_answers', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quiz_answers_user_id_timestamp_id', table_name='quiz_answers')
+    op.drop_index('ix_quiz_answers_company_id_timestamp_id', table_name='quiz_answers')
+    op.drop_table('quiz_answers')
@@ -0,0 +1,39 @@
+"""quiz result aggregates
+
+Revision ID: 7b3e5a1c9d42
+Revises: 4f1c2d9a7e31
+Create Date: 2026-10-18 14:03:27.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e5a1c9d42'
+down_revision = '4f1c2d9a7e31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('quiz_result_aggregates',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('ratio_sum', sa.Float(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'company_id')
+    )
+    op.execute(
+        "INSERT INTO quiz_result_aggregates (user_id, company_id, ratio_sum, attempts) "
+        "SELECT user_id, company_id, SUM(correct_answers::float / questions), COUNT(*) "
+        "FROM quiz_results "
+        "WHERE user_id IS NOT NULL AND company_id IS NOT NULL AND questions > 0 "
+        "GROUP BY user_id, company_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('quiz_result_aggregates')
@@ -0,0 +1,24 @@
+"""quiz results company/user timeline index
+
+Revision ID: c5d81e0f6a27
+Revises: 7b3e5a1c9d42
+Create Date: 2026-10-18 15:21:09.382114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d81e0f6a27'
+down_revision = '7b3e5a1c9d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_quiz_results_company_id_user_id_timestamp', 'quiz_results', ['company_id', 'user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quiz_results_company_id_user_id_timestamp', table_name='quiz_results')
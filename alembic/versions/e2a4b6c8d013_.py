@@ -0,0 +1,46 @@
+"""quiz due dates
+
+Revision ID: e2a4b6c8d013
+Revises: c5d81e0f6a27
+Create Date: 2026-10-18 17:44:52.906318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a4b6c8d013'
+down_revision = 'c5d81e0f6a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('quiz_due',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('last_completed_at', sa.DateTime(), nullable=False),
+    sa.Column('next_due_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'quiz_id')
+    )
+    op.create_index('ix_quiz_due_next_due_at', 'quiz_due', ['next_due_at'], unique=False)
+    op.create_index('ix_quiz_due_user_id_next_due_at', 'quiz_due', ['user_id', 'next_due_at'], unique=False)
+    op.execute(
+        "INSERT INTO quiz_due (user_id, quiz_id, company_id, last_completed_at, next_due_at) "
+        "SELECT quiz_results.user_id, quiz_results.quiz_id, quizzes.company_id, MAX(quiz_results.timestamp), "
+        "MAX(quiz_results.timestamp) + make_interval(days => quizzes.frequency) "
+        "FROM quiz_results JOIN quizzes ON quizzes.id = quiz_results.quiz_id "
+        "WHERE quiz_results.user_id IS NOT NULL "
+        "GROUP BY quiz_results.user_id, quiz_results.quiz_id, quizzes.company_id, quizzes.frequency"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quiz_due_user_id_next_due_at', table_name='quiz_due')
+    op.drop_index('ix_quiz_due_next_due_at', table_name='quiz_due')
+    op.drop_table('quiz_due')
@@ -0,0 +1,30 @@
+"""reminder checkpoints
+
+Revision ID: f7c9e1a3b524
+Revises: e2a4b6c8d013
+Create Date: 2026-10-18 19:02:16.221847
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c9e1a3b524'
+down_revision = 'e2a4b6c8d013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reminder_checkpoints',
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('last_user_id', sa.Integer(), nullable=False),
+    sa.Column('done', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('run_date', 'shard')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reminder_checkpoints')
@@ -25,4 +25,34 @@ AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
 ALGORITHM_AUTH0 = os.getenv("ALGORITHM_AUTH0")
 
 REDIS_PORT = os.getenv("REDIS_PORTS")
-REDIS_HOST = os.getenv("REDIS_HOST")
\ No newline at end of file
+REDIS_HOST = os.getenv("REDIS_HOST")
+
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 30000))
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 5))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+
+EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR", "/tmp/export_jobs")
+EXPORT_JOB_CONCURRENCY = int(os.getenv("EXPORT_JOB_CONCURRENCY", 2))
+EXPORT_JOB_TTL_HOURS = int(os.getenv("EXPORT_JOB_TTL_HOURS", 48))
+
+ANSWER_KEY_CACHE_SIZE = int(os.getenv("ANSWER_KEY_CACHE_SIZE", 1024))
+ANSWER_KEY_REDIS_TTL_HOURS = int(os.getenv("ANSWER_KEY_REDIS_TTL_HOURS", 24))
+
+QUIZ_CACHE_SIZE = int(os.getenv("QUIZ_CACHE_SIZE", 1024))
+QUIZ_CACHE_TTL_HOURS = int(os.getenv("QUIZ_CACHE_TTL_HOURS", 24))
+
+LEADERBOARD_REBUILD_TIMEOUT_SECONDS = int(os.getenv("LEADERBOARD_REBUILD_TIMEOUT_SECONDS", 3600))
+
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", 16))
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", 1000))
+REMINDER_RETRY_SECONDS = float(os.getenv("REMINDER_RETRY_SECONDS", 5))
@@ -0,0 +1,120 @@
+"""Database round trips for the new-quiz notification fan-out.
+
+Seeds a throwaway company with N members in the Postgres configured in ENV,
+then compares the old per-member add/commit loop with
+NotificationRepository.create_notifications. Everything seeded is removed
+afterwards. Run from the app directory:
+
+    python -m benchmarks.notification_fanout --members 10000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import event, insert, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from ENV import DB_URL_CONNECT_SCRIPT
+from db.connect import create_engine
+from models.Models import User, Company, Action, Notification
+from repositories.notification_repository import NotificationRepository
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def count_statement(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self.count_statement)
+        event.listen(self.engine.sync_engine, "commit", self.count_statement)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine.sync_engine, "before_cursor_execute", self.count_statement)
+        event.remove(self.engine.sync_engine, "commit", self.count_statement)
+
+
+async def seed(session: AsyncSession, members: int):
+    tag = uuid.uuid4().hex[:8]
+    users = await session.execute(insert(User).returning(User.id), [
+        {"username": f"bench_{tag}_{number}", "email": f"bench_{tag}_{number}@example.com", "password": "-",
+         "roles": []}
+        for number in range(members + 1)
+    ])
+    user_ids = users.scalars().all()
+    company = Company(name=f"bench {tag}", owner_id=user_ids[0])
+    session.add(company)
+    await session.flush()
+    await session.execute(insert(Action), [
+        {"status": "ACCEPTED", "type_of_action": "MEMBER", "user_id": user_id, "company_id": company.id}
+        for user_id in user_ids[1:]
+    ])
+    await session.commit()
+    return company.id, tag
+
+
+def bench_users(tag: str):
+    return select(User.id).where(User.username.like(f"bench_{tag}_%"))
+
+
+async def delete_notifications(session: AsyncSession, tag: str):
+    await session.execute(delete(Notification).where(Notification.user_id.in_(bench_users(tag))))
+    await session.commit()
+
+
+async def cleanup(engine: AsyncEngine, session: AsyncSession, company_id: int, tag: str):
+    await delete_notifications(session, tag)
+    await session.execute(delete(Company).where(Company.id == company_id))
+    await session.commit()
+    # Every deleted user runs foreign key checks that scan these tables, dead benchmark rows included
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM actions, notifications"))
+    await session.execute(delete(User).where(User.id.in_(bench_users(tag))))
+    await session.commit()
+
+
+async def per_member_commits(session: AsyncSession, company_id: int):
+    members = await session.execute(
+        select(Action.user_id).where(Action.type_of_action == "MEMBER", Action.company_id == company_id))
+    for user_id in members.scalars().all():
+        session.add(Notification(status="UNREAD", text=f"New quiz for company {company_id} has been created",
+                                 user_id=user_id))
+        await session.commit()
+
+
+async def run(members: int):
+    engine = create_engine(DB_URL_CONNECT_SCRIPT)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        company_id, tag = await seed(session, members)
+        try:
+            cases = (
+                ("per-member commits", lambda: per_member_commits(session, company_id)),
+                ("INSERT ... SELECT", lambda: NotificationRepository(session).create_notifications(company_id, 0)),
+            )
+            for name, fan_out in cases:
+                with StatementCounter(engine) as counter:
+                    started = time.perf_counter()
+                    await fan_out()
+                    elapsed = time.perf_counter() - started
+                print(f"{name:<20} {counter.count:>8} round trips {elapsed * 1000:>10.1f} ms")
+                await delete_notifications(session, tag)
+        finally:
+            await cleanup(engine, session, company_id, tag)
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(run(args.members))
@@ -0,0 +1,93 @@
+"""Per-quiz running averages for users with many attempts.
+
+Compares the old string-concatenating QuizResultRepository.math with the
+current math and with average_series, including JSON serialization of the
+response. Needs no database. Run from the app directory:
+
+    python -m benchmarks.quiz_averages --attempts 5000
+"""
+import argparse
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from repositories.quiz_result_repository import QuizResultRepository
+from schemas.QuizResult import Average, QuizAverage, UserQuizAveragesResponse, UserQuizAverageSeriesResponse
+
+Row = namedtuple("Row", ["quiz_id", "timestamp", "questions", "correct_answers"])
+
+
+def make_results(attempts: int, quizzes: int) -> list:
+    started = datetime(2023, 1, 1)
+    return [
+        Row(quiz_id=number % quizzes, timestamp=started + timedelta(hours=number), questions=10,
+            correct_answers=number % 11)
+        for number in range(attempts)
+    ]
+
+
+def legacy_math(result) -> list:
+    averages = {}
+
+    for quiz_average in result:
+        quiz_id = quiz_average.quiz_id
+        if quiz_id not in averages:
+            averages[quiz_id] = {
+                "quiz_id": quiz_id,
+                "average": "",
+                "timestamp": "",
+                "total_questions": 0,
+                "total_correct_answers": 0
+            }
+
+        total_questions = averages.get(quiz_id, {}).get("total_questions", 0)
+        correct_questions = averages.get(quiz_id, {}).get("total_correct_answers", 0)
+
+        total_questions += quiz_average.questions
+        correct_questions += quiz_average.correct_answers
+
+        if total_questions > 0:
+            average = correct_questions / total_questions * 5
+            if averages.get(quiz_id, {}).get("average"):
+                averages[quiz_id]["average"] += f", {average}"
+            else:
+                averages[quiz_id]["average"] = str(average)
+
+        if averages.get(quiz_id, {}).get("timestamp"):
+            averages[quiz_id]["timestamp"] += f", {quiz_average.timestamp.strftime('%d/%m')}"
+        else:
+            averages[quiz_id]["timestamp"] = quiz_average.timestamp.strftime('%d/%m')
+
+        averages[quiz_id]["total_questions"] = total_questions
+        averages[quiz_id]["total_correct_answers"] = correct_questions
+
+    return [Average(**values) for values in averages.values()]
+
+
+def run(attempts: int, quizzes: int, repeat: int):
+    repository = QuizResultRepository(database=None)
+    result = make_results(attempts, quizzes)
+
+    def legacy_response(averages):
+        return UserQuizAveragesResponse(averages=[QuizAverage(Avges={value.quiz_id: value for value in averages})])
+
+    cases = (
+        ("legacy string math", lambda: legacy_response(legacy_math(result))),
+        ("joined string math", lambda: legacy_response(repository.math(result))),
+        ("average_series", lambda: UserQuizAverageSeriesResponse(quizzes=repository.average_series(result))),
+    )
+    for name, build in cases:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            payload = build().model_dump_json()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<20} {elapsed / repeat * 1000:>10.2f} ms/request {len(payload):>10} bytes")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--quizzes", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    run(args.attempts, args.quizzes, args.repeat)
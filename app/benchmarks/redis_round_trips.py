@@ -0,0 +1,95 @@
+"""Redis round trips per take-quiz submission.
+
+Compares the old per-question save_quiz loop with save_quiz_batch against the
+Redis configured in ENV. Run from the app directory:
+
+    python -m benchmarks.redis_round_trips --questions 50
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from redis.asyncio.connection import Connection
+
+from db.connect import connect_Redis, close_redis
+from repositories.redis_repository import RedisRepository
+
+BENCH_COMPANY_ID = -1
+BENCH_USER_ID = -1
+
+
+class RoundTripCounter:
+    def __init__(self):
+        self.count = 0
+        self._send_packed_command = Connection.send_packed_command
+
+    def __enter__(self):
+        counter = self
+        original = self._send_packed_command
+
+        async def send_packed_command(connection, command, check_health=True):
+            counter.count += 1
+            return await original(connection, command, check_health)
+
+        Connection.send_packed_command = send_packed_command
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Connection.send_packed_command = self._send_packed_command
+
+
+def make_answers(questions: int) -> list:
+    return [
+        {
+            "user_id": BENCH_USER_ID,
+            "company_id": BENCH_COMPANY_ID,
+            "quiz_id": 1,
+            "question": f"question {number}",
+            "option": f"option {number}",
+            "is_correct": str(number % 2 == 0),
+            "time": datetime.utcnow().isoformat()
+        }
+        for number in range(questions)
+    ]
+
+
+async def cleanup(redis_client):
+    keys = [RedisRepository.user_index_key(BENCH_USER_ID), RedisRepository.company_index_key(BENCH_COMPANY_ID)]
+    keys += await redis_client.zrange(keys[1], 0, -1)
+    await redis_client.delete(*keys)
+
+
+async def run(questions: int, repeat: int):
+    redis_client = await connect_Redis()
+    redis_rep = RedisRepository(redis_client)
+    await redis_client.ping()
+    answers = make_answers(questions)
+
+    async def per_question():
+        for quiz_data in answers:
+            await redis_rep.save_quiz(quiz_data)
+
+    async def batch():
+        await redis_rep.save_quiz_batch(answers)
+
+    for name, submit in (("per-question save_quiz", per_question), ("save_quiz_batch", batch)):
+        with RoundTripCounter() as counter:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                await submit()
+            elapsed = time.perf_counter() - started
+        print(f"{name:<24} {counter.count / repeat:>8.1f} round trips/submission "
+              f"{elapsed / repeat * 1000:>8.2f} ms/submission")
+        await cleanup(redis_client)
+
+    await redis_rep.disconnect()
+    await close_redis()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.questions, args.repeat))
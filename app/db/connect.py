@@ -1,20 +1,76 @@
-import asyncio
-import os
-from contextlib import asynccontextmanager
-
-import redis
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_session
-from sqlalchemy.orm import sessionmaker
+from redis import asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine, create_async_engine, async_sessionmaker
 from dotenv import load_dotenv
-from ENV import DB_URL_CONNECT
+from ENV import DB_URL_CONNECT, DB_ECHO, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE, \
+    DB_STATEMENT_TIMEOUT, REDIS_HOST, REDIS_PORT, REDIS_MAX_CONNECTIONS, REDIS_SOCKET_TIMEOUT, \
+    REDIS_SOCKET_CONNECT_TIMEOUT, REDIS_HEALTH_CHECK_INTERVAL
 
 # Load environment variables
 load_dotenv()
 
+# One engine (and connection pool) per worker process, owned by the app lifespan
+engine: AsyncEngine | None = None
+async_session: async_sessionmaker | None = None
+redis_pool: aioredis.ConnectionPool | None = None
+
+
+def create_engine(database_url: str = DB_URL_CONNECT) -> AsyncEngine:
+    return create_async_engine(
+        database_url,
+        echo=DB_ECHO,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+        connect_args={"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT)}},
+    )
+
+
+def init_engine(database_url: str = DB_URL_CONNECT) -> AsyncEngine:
+    global engine, async_session
+    if engine is None:
+        engine = create_engine(database_url)
+        async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return engine
+
+
+async def dispose_engine():
+    global engine, async_session
+    if engine is not None:
+        await engine.dispose()
+    engine = None
+    async_session = None
 
-async def connect_Postgres():
-    database_url = DB_URL_CONNECT
-    engine = create_async_engine(database_url, future=True, echo=True)
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+async def connect_Postgres() -> AsyncSession:
+    if async_session is None:
+        init_engine()
     return async_session()
 
+
+def init_redis() -> aioredis.ConnectionPool:
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = aioredis.ConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        )
+    return redis_pool
+
+
+async def close_redis():
+    global redis_pool
+    if redis_pool is not None:
+        await redis_pool.disconnect()
+    redis_pool = None
+
+
+async def connect_Redis() -> aioredis.Redis:
+    if redis_pool is None:
+        init_redis()
+    return aioredis.Redis(connection_pool=redis_pool)
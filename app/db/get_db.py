@@ -1,10 +1,4 @@
-import redis
-
-
-from ENV import REDIS_HOST, REDIS_PORT
-
-
-from db.connect import connect_Postgres
+from db.connect import connect_Postgres, connect_Redis
 
 
 async def get_db():
@@ -17,7 +11,7 @@ async def get_db():
 
 
 async def get_redis():
-    return redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+    return await connect_Redis()
 
 
 
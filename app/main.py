@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from typing import Annotated
 
 import uvicorn
@@ -5,9 +6,11 @@ from fastapi import FastAPI, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
 from ENV import host, port
+from db.connect import init_engine, dispose_engine, init_redis, close_redis
 from fastapi.middleware.cors import CORSMiddleware
 
 from routers.router_export import router_export
+from routers.router_leaderboard import router_leaderboard
 from routers.router_notification import router_notification
 from routers.router_quiz_result import router_quiz_result
 from  routers.routers_company import router_companies
@@ -16,7 +19,16 @@ from routers.routers_user import router_user
 from routers.router_quizzes import router_quiz
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_engine()
+    init_redis()
+    yield
+    await close_redis()
+    await dispose_engine()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:3000", "http://localhost:3001"]
 
@@ -37,6 +49,7 @@ app.include_router(router_quiz)
 app.include_router(router_export)
 app.include_router(router_quiz_result)
 app.include_router(router_notification)
+app.include_router(router_leaderboard)
 
 
 
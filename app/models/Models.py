@@ -1,6 +1,6 @@
 from typing import List
 
-from sqlalchemy import Column, Integer, String, Boolean, ARRAY, ForeignKey, DateTime, Float, func
+from sqlalchemy import Column, Integer, String, Boolean, ARRAY, ForeignKey, DateTime, Float, func, Index, Date
 
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -121,6 +121,9 @@ class Option(BaseModel):
 
 class QuizResult(BaseModel):
     __tablename__ = "quiz_results"
+    __table_args__ = (
+        Index("ix_quiz_results_company_id_user_id_timestamp", "company_id", "user_id", "timestamp", "id"),
+    )
 
 
     id = Column(Integer, primary_key=True, index=True)
@@ -134,6 +137,66 @@ class QuizResult(BaseModel):
     quiz_id:Mapped[int] = mapped_column(ForeignKey("quizzes.id"))
 
 
+class QuizResultAggregate(BaseModel):
+    __tablename__ = "quiz_result_aggregates"
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    company_id = Column(Integer, ForeignKey('companies.id', ondelete="CASCADE"), primary_key=True)
+    ratio_sum = Column(Float, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+
+
+class QuizDue(BaseModel):
+    __tablename__ = "quiz_due"
+    __table_args__ = (
+        Index("ix_quiz_due_next_due_at", "next_due_at"),
+        Index("ix_quiz_due_user_id_next_due_at", "user_id", "next_due_at"),
+    )
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    quiz_id = Column(Integer, ForeignKey('quizzes.id', ondelete="CASCADE"), primary_key=True)
+    company_id = Column(Integer, ForeignKey('companies.id', ondelete="CASCADE"), nullable=False)
+    last_completed_at = Column(DateTime, nullable=False)
+    next_due_at = Column(DateTime, nullable=False)
+
+
+class SentReminder(BaseModel):
+    __tablename__ = "sent_reminders"
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    quiz_id = Column(Integer, ForeignKey('quizzes.id', ondelete="CASCADE"), primary_key=True)
+    due_period = Column(DateTime, primary_key=True)
+
+
+class ReminderCheckpoint(BaseModel):
+    __tablename__ = "reminder_checkpoints"
+
+    run_date = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    last_user_id = Column(Integer, nullable=False, default=0)
+    done = Column(Boolean, nullable=False, default=False)
+
+
+class QuizAnswer(BaseModel):
+    __tablename__ = "quiz_answers"
+    __table_args__ = (
+        Index("ix_quiz_answers_company_id_timestamp_id", "company_id", "timestamp", "id"),
+        Index("ix_quiz_answers_user_id_timestamp_id", "user_id", "timestamp", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    quiz_result_id = Column(Integer, ForeignKey('quiz_results.id', ondelete="CASCADE"), nullable=False)
+    company_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    quiz_id = Column(Integer, nullable=False)
+    question_id = Column(Integer, nullable=False)
+    option_id = Column(Integer, nullable=False)
+    question = Column(String, nullable=False)
+    option = Column(String, nullable=False)
+    is_correct = Column(Boolean, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+
+
 class Notification(BaseModel):
     __tablename__ = "notifications"
 
@@ -0,0 +1,26 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from ENV import DB_URL_CONNECT_SCRIPT
+from db.connect import create_engine, close_redis
+from repositories.leaderboard_repository import LeaderboardRepository
+
+engine = create_engine(DB_URL_CONNECT_SCRIPT)
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def rebuild_leaderboards():
+    async with async_session() as session:
+        users = await LeaderboardRepository().rebuild(session)
+    if users is None:
+        print("A leaderboard rebuild is already running")
+    else:
+        print(f"Rebuilt leaderboards for {users} users")
+    await close_redis()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_leaderboards())
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional, Dict, Set
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ENV import ANSWER_KEY_CACHE_SIZE, ANSWER_KEY_REDIS_TTL_HOURS
+from db.get_db import get_redis
+from models.Models import Option, Question, Quiz
+from repositories.quiz_cache_repository import QuizCacheRepository
+from schemas.AnswerKey import AnswerKey, AnswerKeyOption
+
+REDIS_TTL_SECONDS = int(timedelta(hours=ANSWER_KEY_REDIS_TTL_HOURS).total_seconds())
+
+# (quiz_id, version) -> AnswerKey, least recently used first
+answer_key_cache: "OrderedDict[tuple, AnswerKey]" = OrderedDict()
+
+
+class AnswerKeyRepository:
+    # Entries are keyed on the quiz cache version, which every committed quiz edit replaces,
+    # so a key loaded before an edit can only be stored under a version nobody reads anymore.
+
+    def __init__(self, database: AsyncSession, redis_client: Redis = None):
+        self.async_session = database
+        self.redis_client = redis_client
+
+    async def connect(self):
+        if self.redis_client is None:
+            self.redis_client = await get_redis()
+
+    @staticmethod
+    def answer_key_key(quiz_id: int, version: str) -> str:
+        # Bump the format version whenever the AnswerKey format changes, entries in the old format then simply expire
+        return f"answer_key:v3:{quiz_id}:{version}"
+
+    @staticmethod
+    def get_local(quiz_id: int, version: str) -> Optional[AnswerKey]:
+        answer_key = answer_key_cache.get((quiz_id, version))
+        if answer_key is not None:
+            answer_key_cache.move_to_end((quiz_id, version))
+        return answer_key
+
+    @staticmethod
+    def set_local(quiz_id: int, version: str, answer_key: AnswerKey):
+        answer_key_cache[(quiz_id, version)] = answer_key
+        answer_key_cache.move_to_end((quiz_id, version))
+        while len(answer_key_cache) > ANSWER_KEY_CACHE_SIZE:
+            answer_key_cache.popitem(last=False)
+
+    async def load_answer_key(self, quiz_id: int) -> AnswerKey:
+        query = select(
+            Quiz.company_id, Question.id, Question.text, Option.id, Option.text, Option.is_correct
+        ).outerjoin(Question, Question.quiz_id == Quiz.id).outerjoin(
+            Option, Option.question_id == Question.id).where(Quiz.id == quiz_id)
+        rows = await self.async_session.execute(query)
+        company_id, questions, options, correct = None, {}, {}, {}
+        for company_id, question_id, question_text, option_id, option_text, is_correct in rows:
+            if question_id is None:
+                continue
+            questions[question_id] = question_text
+            correct.setdefault(question_id, set())
+            if option_id is None:
+                continue
+            options[option_id] = AnswerKeyOption(question_id=question_id, text=option_text, is_correct=bool(is_correct))
+            if is_correct:
+                correct[question_id].add(option_id)
+        return AnswerKey(quiz_id=quiz_id, company_id=company_id, questions=questions, options=options, correct=correct)
+
+    async def get_answer_key(self, quiz_id: int) -> AnswerKey:
+        try:
+            await self.connect()
+            # Read before Postgres, so a concurrent edit retires the version this key is stored under
+            version = await QuizCacheRepository(self.redis_client).get_version("quiz", quiz_id)
+        except Exception as e:
+            print(f"An error occurred while reading the answer key version: {e}")
+            return await self.load_answer_key(quiz_id)
+
+        answer_key = self.get_local(quiz_id, version)
+        if answer_key is not None:
+            return answer_key
+
+        try:
+            cached = await self.redis_client.get(self.answer_key_key(quiz_id, version))
+        except Exception as e:
+            print(f"An error occurred while reading the answer key from Redis: {e}")
+            cached = None
+
+        if cached is not None:
+            try:
+                answer_key = AnswerKey.model_validate_json(cached)
+            except ValueError as e:
+                print(f"An error occurred while parsing the cached answer key: {e}")
+
+        if answer_key is None:
+            answer_key = await self.load_answer_key(quiz_id)
+            try:
+                await self.redis_client.set(self.answer_key_key(quiz_id, version), answer_key.model_dump_json(),
+                                            ex=REDIS_TTL_SECONDS)
+            except Exception as e:
+                print(f"An error occurred while saving the answer key to Redis: {e}")
+
+        self.set_local(quiz_id, version, answer_key)
+        return answer_key
+
+    @staticmethod
+    def unanswered_questions(answer_key: AnswerKey, answers: Dict[int, int]) -> Set[int]:
+        return answer_key.questions.keys() - answers.keys()
+
+    @staticmethod
+    def validate_submission(answer_key: AnswerKey, answers: Dict[int, int]) -> Optional[str]:
+        for question_id, option_id in answers.items():
+            if question_id not in answer_key.questions:
+                return f"Question {question_id} does not belong to quiz {answer_key.quiz_id}"
+            option = answer_key.options.get(option_id)
+            if option is None or option.question_id != question_id:
+                return f"Option {option_id} does not belong to question {question_id}"
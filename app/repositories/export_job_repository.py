@@ -0,0 +1,141 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from ENV import EXPORT_JOB_DIR, EXPORT_JOB_CONCURRENCY, EXPORT_JOB_TTL_HOURS
+from db.connect import connect_Postgres
+from db.get_db import get_redis
+from repositories.export_repository import ExportRepository
+from repositories.quiz_answer_repository import QuizAnswerRepository
+from schemas.ExportJob import ExportJobRequest, ExportJobResponse
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL_SECONDS = int(timedelta(hours=EXPORT_JOB_TTL_HOURS).total_seconds())
+
+# Caps how many export jobs this worker process serializes at the same time
+job_semaphore = asyncio.Semaphore(EXPORT_JOB_CONCURRENCY)
+
+
+class ExportJobRepository:
+    def __init__(self, redis_client: Redis = None):
+        self.redis_client = redis_client
+
+    async def connect(self):
+        if self.redis_client is None:
+            self.redis_client = await get_redis()
+
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        return f"export_job:{job_id}"
+
+    @staticmethod
+    def artifact_path(job_id: str, format: str) -> str:
+        return os.path.join(EXPORT_JOB_DIR, f"{job_id}.{format}.gz")
+
+    @staticmethod
+    def job_to_response(job_id: str, job: dict) -> ExportJobResponse:
+        return ExportJobResponse(
+            id=job_id,
+            status=job["status"],
+            company_id=int(job["company_id"]),
+            format=job["format"],
+            created_at=job["created_at"],
+            finished_at=job.get("finished_at") or None,
+            rows=int(job.get("rows", 0)),
+            size=int(job.get("size", 0)),
+            error=job.get("error") or None
+        )
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        await self.connect()
+        job = await self.redis_client.hgetall(self.job_key(job_id))
+        return job or None
+
+    async def update_job(self, job_id: str, **fields):
+        await self.connect()
+        await self.redis_client.hset(self.job_key(job_id), mapping=fields)
+
+    async def create_job(self, request: ExportJobRequest, user_id: int) -> ExportJobResponse:
+        await self.connect()
+        job_id = uuid.uuid4().hex
+        job = {
+            "status": "PENDING",
+            "user_id": user_id,
+            "company_id": request.company_id,
+            "format": request.format,
+            "date_from": request.date_from.isoformat() if request.date_from else "",
+            "date_to": request.date_to.isoformat() if request.date_to else "",
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.job_key(job_id), mapping=job)
+            pipe.expire(self.job_key(job_id), JOB_TTL_SECONDS)
+            await pipe.execute()
+        return self.job_to_response(job_id, job)
+
+    @staticmethod
+    def remove_expired_artifacts():
+        if not os.path.isdir(EXPORT_JOB_DIR):
+            return
+        expire_before = time.time() - JOB_TTL_SECONDS
+        for filename in os.listdir(EXPORT_JOB_DIR):
+            path = os.path.join(EXPORT_JOB_DIR, filename)
+            if os.path.getmtime(path) < expire_before:
+                os.remove(path)
+
+    async def run_job(self, job_id: str):
+        job = await self.get_job(job_id)
+        if not job:
+            return
+        try:
+            await asyncio.to_thread(self.remove_expired_artifacts)
+        except Exception as e:
+            # Cleanup is best-effort, a failure here must not leave the job PENDING
+            logger.warning(f"Could not remove expired export artifacts: {e}")
+
+        async with job_semaphore:
+            await self.update_job(job_id, status="RUNNING")
+            path = self.artifact_path(job_id, job["format"])
+            rows = 0
+            try:
+                os.makedirs(EXPORT_JOB_DIR, exist_ok=True)
+                export_repository = ExportRepository()
+                async with await connect_Postgres() as session:
+                    answers = QuizAnswerRepository(database=session).iter_company_answers(
+                        int(job["company_id"]),
+                        date_from=datetime.fromisoformat(job["date_from"]) if job["date_from"] else None,
+                        date_to=datetime.fromisoformat(job["date_to"]) if job["date_to"] else None,
+                    )
+
+                    async def counted(results):
+                        nonlocal rows
+                        async for result in results:
+                            rows += 1
+                            yield result
+
+                    if job["format"] == "csv":
+                        chunks = export_repository.stream_csv(counted(answers))
+                    else:
+                        chunks = export_repository.stream_ndjson(counted(answers))
+
+                    with gzip.open(path, "wt", encoding="utf-8", newline="") as artifact:
+                        async for chunk in chunks:
+                            await asyncio.to_thread(artifact.write, chunk)
+
+                await self.update_job(job_id, status="DONE", rows=rows, size=os.path.getsize(path),
+                                      finished_at=datetime.utcnow().isoformat())
+                logger.info(f"Export job {job_id} finished with {rows} rows")
+            except Exception as e:
+                logger.exception(f"An error occurred while running export job {job_id}: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+                await self.update_job(job_id, status="FAILED", error=str(e),
+                                      finished_at=datetime.utcnow().isoformat())
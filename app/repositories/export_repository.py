@@ -1,31 +1,190 @@
 import csv
+import io
+import json
+import os
+import re
+from datetime import datetime
+from typing import AsyncIterator, Optional
 
-from fastapi.responses import  FileResponse
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from ENV import EXPORT_CHUNK_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+CSV_COLUMNS = ["user_id", "company_id", "quiz_id", "question", "option", "is_correct", "time"]
+
+COLUMNAR_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only stream that hands out what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
 
 
 class ExportRepository:
 
-    def generate_csv_response(self, user_results, filename):
-        csv_filename = filename
-        csv_response = FileResponse(csv_filename,
-                                    headers={"Content-Disposition": f"attachment; filename={csv_filename}"})
-
-        with open(csv_filename, "w", newline="") as csv_file:
-            csv_writer = csv.writer(csv_file)
-            csv_writer.writerow(["user_id", "company_id", "quiz_id", "question", "option", "is_correct", "time"])
-
-            for result in user_results:
-                quiz_data = {
-                    "user_id": result["user_id"],
-                    "company_id": result["company_id"],
-                    "quiz_id": result["quiz_id"],
-                    "question": result["question"],
-                    "option": result["option"],
-                    "is_correct": result["is_correct"],
-                    "time": result["time"]
-                }
-                csv_writer.writerow([quiz_data["user_id"], quiz_data["company_id"], quiz_data["quiz_id"],
-                                     quiz_data["question"], quiz_data["option"], quiz_data["is_correct"],
-                                     quiz_data["time"]])
-        return csv_response
+    async def stream_csv(self, results: AsyncIterator[dict], chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        csv_writer.writerow(CSV_COLUMNS)
+        rows = 0
+
+        async for result in results:
+            csv_writer.writerow([result.get(column) for column in CSV_COLUMNS])
+            rows += 1
+            if rows % chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue()
+
+    def generate_csv_response(self, results: AsyncIterator[dict], filename: str) -> StreamingResponse:
+        return StreamingResponse(self.stream_csv(results), media_type="text/csv",
+                                 headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+    async def stream_ndjson(self, results: AsyncIterator[dict], chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+        lines = []
+        async for result in results:
+            lines.append(json.dumps(result))
+            if len(lines) == chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    def generate_ndjson_response(self, results: AsyncIterator[dict]) -> StreamingResponse:
+        return StreamingResponse(self.stream_ndjson(results), media_type="application/x-ndjson")
+
+    @staticmethod
+    def parse_range(range_header: Optional[str], file_size: int) -> Optional[tuple]:
+        if not range_header:
+            return None
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+        if not match or match.groups() == ("", ""):
+            raise HTTPException(status_code=416, detail="Invalid range",
+                                headers={"Content-Range": f"bytes */{file_size}"})
+        start, end = match.groups()
+        if start == "":
+            start, end = max(file_size - int(end), 0), file_size - 1
+        else:
+            start, end = int(start), min(int(end), file_size - 1) if end else file_size - 1
+        if start > end or start >= file_size:
+            raise HTTPException(status_code=416, detail="Range not satisfiable",
+                                headers={"Content-Range": f"bytes */{file_size}"})
+        return start, end
+
+    @staticmethod
+    def iter_file(path: str, start: int, end: int):
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def generate_file_response(self, path: str, filename: str, range_header: Optional[str] = None,
+                               media_type: str = "application/gzip") -> StreamingResponse:
+        file_size = os.path.getsize(path)
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Accept-Ranges": "bytes",
+        }
+        byte_range = self.parse_range(range_header, file_size)
+        if byte_range is None:
+            headers["Content-Length"] = str(file_size)
+            return StreamingResponse(self.iter_file(path, 0, file_size - 1), media_type=media_type, headers=headers)
+
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(self.iter_file(path, start, end), status_code=206, media_type=media_type,
+                                 headers=headers)
+
+    @staticmethod
+    def columnar_schema():
+        return pa.schema([
+            ("user_id", pa.int64()),
+            ("company_id", pa.int64()),
+            ("quiz_id", pa.int64()),
+            ("question", pa.string()),
+            ("option", pa.string()),
+            ("is_correct", pa.bool_()),
+            ("timestamp", pa.timestamp("us")),
+        ])
+
+    def results_to_batch(self, results: list):
+        return pa.RecordBatch.from_pydict({
+            "user_id": [int(result["user_id"]) for result in results],
+            "company_id": [int(result["company_id"]) for result in results],
+            "quiz_id": [int(result["quiz_id"]) for result in results],
+            "question": [result.get("question") for result in results],
+            "option": [result.get("option") for result in results],
+            # Redis hashes hold "True"/"False", quiz_answers rows hold real booleans
+            "is_correct": [str(result["is_correct"]) == "True" for result in results],
+            "timestamp": [datetime.fromisoformat(result["time"]) for result in results],
+        }, schema=self.columnar_schema())
+
+    async def stream_columnar(self, results: AsyncIterator[dict], format: str,
+                              chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        sink = ChunkSink()
+        if format == "parquet":
+            writer = pq.ParquetWriter(sink, self.columnar_schema(), compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(sink, self.columnar_schema())
+
+        batch = []
+        async for result in results:
+            batch.append(result)
+            if len(batch) == chunk_size:
+                writer.write_batch(self.results_to_batch(batch))
+                batch = []
+                yield sink.drain()
+
+        if batch:
+            writer.write_batch(self.results_to_batch(batch))
+        writer.close()
+        yield sink.drain()
 
+    def generate_columnar_response(self, results: AsyncIterator[dict], format: str, filename: str) -> StreamingResponse:
+        if pa is None:
+            raise HTTPException(status_code=501, detail=f"{format} export is not available on this server")
+        return StreamingResponse(self.stream_columnar(results, format), media_type=COLUMNAR_MEDIA_TYPES[format],
+                                 headers={"Content-Disposition": f"attachment; filename={filename}"})
@@ -0,0 +1,189 @@
+import json
+import uuid
+from typing import Dict, Optional
+
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ENV import EXPORT_CHUNK_SIZE, LEADERBOARD_REBUILD_TIMEOUT_SECONDS
+from db.get_db import get_redis
+from models.Models import QuizResultAggregate
+from schemas.Leaderboard import LeaderboardEntry, LeaderboardResponse, LeaderboardRankResponse
+
+GLOBAL_LEADERBOARD_KEY = "leaderboard:global"
+# Holds "{token}:{company_id}", or "{token}:*" for a full rebuild, while a rebuild fills its temporary boards
+REBUILD_KEY = "leaderboard:rebuild"
+
+# During a rebuild live scores also go into its temporary boards, which are remembered in "{REBUILD_KEY}:{token}"
+UPDATE_USER_SCRIPT = """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+local rebuild = redis.call('GET', KEYS[3])
+if rebuild then
+    local token, company = string.match(rebuild, '^(%w+):(.*)$')
+    if company == '*' or company == ARGV[4] then
+        redis.call('ZADD', KEYS[1] .. ':' .. token, ARGV[2], ARGV[1])
+        redis.call('SADD', KEYS[3] .. ':' .. token, KEYS[1])
+    end
+    if company == '*' then
+        redis.call('ZADD', KEYS[2] .. ':' .. token, ARGV[3], ARGV[1])
+        redis.call('SADD', KEYS[3] .. ':' .. token, KEYS[2])
+    end
+end
+"""
+
+# Renames the temporary boards over the live ones and deletes stale boards, or only drops the temporary
+# boards when asked to or when the rebuild no longer holds REBUILD_KEY
+FINISH_REBUILD_SCRIPT = """
+local token = ARGV[2]
+local boards = {}
+for _, key in ipairs(redis.call('SMEMBERS', KEYS[1] .. ':' .. token)) do
+    boards[key] = true
+end
+for i = 5, #ARGV do
+    boards[ARGV[i]] = true
+end
+local owned = redis.call('GET', KEYS[1]) == ARGV[1]
+local swap = owned and ARGV[3] == '1'
+for key in pairs(boards) do
+    if swap then
+        redis.call('RENAME', key .. ':' .. token, key)
+    else
+        redis.call('DEL', key .. ':' .. token)
+    end
+end
+if swap then
+    for _, key in ipairs(cjson.decode(ARGV[4])) do
+        if not boards[key] then
+            redis.call('DEL', key)
+        end
+    end
+end
+redis.call('DEL', KEYS[1] .. ':' .. token)
+if owned then
+    redis.call('DEL', KEYS[1])
+end
+return swap and 1 or 0
+"""
+
+# source -> script, registered once per process; every call passes the repository's own client
+scripts: Dict[str, AsyncScript] = {}
+
+
+class LeaderboardRepository:
+    def __init__(self, redis_client: Redis = None):
+        self.redis_client = redis_client
+
+    async def connect(self):
+        if self.redis_client is None:
+            self.redis_client = await get_redis()
+
+    def script(self, source: str) -> AsyncScript:
+        if source not in scripts:
+            scripts[source] = self.redis_client.register_script(source)
+        return scripts[source]
+
+    @staticmethod
+    def company_key(company_id) -> str:
+        return f"leaderboard:company:{company_id}"
+
+    @staticmethod
+    def board_key(company_id: Optional[int] = None) -> str:
+        if company_id is None:
+            return GLOBAL_LEADERBOARD_KEY
+        return LeaderboardRepository.company_key(company_id)
+
+    async def update_user(self, user_id: int, company_id: int, company_rating: float, system_rating: float):
+        await self.connect()
+        await self.script(UPDATE_USER_SCRIPT)(
+            keys=[self.company_key(company_id), GLOBAL_LEADERBOARD_KEY, REBUILD_KEY],
+            args=[user_id, company_rating, system_rating, company_id], client=self.redis_client)
+
+    async def get_top(self, company_id: Optional[int] = None, limit: int = 10) -> LeaderboardResponse:
+        await self.connect()
+        key = self.board_key(company_id)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+            pipe.zcard(key)
+            top, total = await pipe.execute()
+        entries = [
+            LeaderboardEntry(user_id=int(user_id), rating=rating, rank=rank)
+            for rank, (user_id, rating) in enumerate(top, start=1)
+        ]
+        return LeaderboardResponse(entries=entries, total=total)
+
+    async def get_rank(self, user_id: int, company_id: Optional[int] = None) -> LeaderboardRankResponse:
+        await self.connect()
+        key = self.board_key(company_id)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(key, user_id)
+            pipe.zscore(key, user_id)
+            pipe.zcard(key)
+            rank, rating, total = await pipe.execute()
+        return LeaderboardRankResponse(user_id=user_id, rating=rating, rank=None if rank is None else rank + 1,
+                                       total=total)
+
+    async def rebuild(self, session: AsyncSession, company_id: Optional[int] = None,
+                      chunk_size: int = EXPORT_CHUNK_SIZE) -> Optional[int]:
+        # Boards are filled under temporary keys and swapped in with RENAME, so readers never see a partial board.
+        # Returns None when another rebuild is already running.
+        await self.connect()
+        token = uuid.uuid4().hex
+        rebuild = f"{token}:{'*' if company_id is None else company_id}"
+        # Taken before the aggregates are read, so every score committed after the read reaches the temporary boards
+        if not await self.redis_client.set(REBUILD_KEY, rebuild, nx=True, ex=LEADERBOARD_REBUILD_TIMEOUT_SECONDS):
+            return None
+
+        boards = set()
+        try:
+            query = select(QuizResultAggregate).order_by(QuizResultAggregate.user_id)
+            if company_id is not None:
+                query = query.where(QuizResultAggregate.company_id == company_id)
+            aggregates = await session.stream_scalars(query.execution_options(yield_per=chunk_size))
+
+            users = 0
+            global_key = f"{GLOBAL_LEADERBOARD_KEY}:{token}"
+            user_id, ratio_sum, attempts = None, 0.0, 0
+
+            # NX keeps a newer score a live update has already written to the temporary board
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                def add_global_rating():
+                    if user_id is not None and company_id is None:
+                        pipe.zadd(global_key, {user_id: ratio_sum / attempts * 5}, nx=True)
+                        boards.add(GLOBAL_LEADERBOARD_KEY)
+
+                async for aggregate in aggregates:
+                    if aggregate.user_id != user_id:
+                        add_global_rating()
+                        user_id, ratio_sum, attempts = aggregate.user_id, 0.0, 0
+                        users += 1
+                    ratio_sum += aggregate.ratio_sum
+                    attempts += aggregate.attempts
+                    key = self.company_key(aggregate.company_id)
+                    pipe.zadd(f"{key}:{token}", {aggregate.user_id: aggregate.ratio_sum / aggregate.attempts * 5},
+                              nx=True)
+                    boards.add(key)
+                    if len(pipe) >= chunk_size:
+                        await pipe.execute()
+                add_global_rating()
+                await pipe.execute()
+
+            stale = set()
+            if company_id is not None:
+                stale.add(self.company_key(company_id))
+            else:
+                stale.add(GLOBAL_LEADERBOARD_KEY)
+                async for key in self.redis_client.scan_iter(match=self.company_key("*"), count=chunk_size):
+                    # Skips temporary keys
+                    if key.count(":") == 2:
+                        stale.add(key)
+        except Exception:
+            await self.script(FINISH_REBUILD_SCRIPT)(
+                keys=[REBUILD_KEY], args=[rebuild, token, 0, "[]", *boards], client=self.redis_client)
+            raise
+
+        swapped = await self.script(FINISH_REBUILD_SCRIPT)(
+            keys=[REBUILD_KEY], args=[rebuild, token, 1, json.dumps(sorted(stale)), *boards], client=self.redis_client)
+        return users if swapped else None
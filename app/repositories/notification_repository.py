@@ -1,12 +1,12 @@
 from typing import List
 
 from fastapi import Depends
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from datetime import datetime
 from db.get_db import get_db
-from models.Models import Notification, Quiz
+from models.Models import Notification, Quiz, Action
 from repositories.action_repository import ActionRepository
 from repositories.company_repository import CompanyRepository
 from schemas.Quiz import DeleteScheme
@@ -18,22 +18,17 @@ class NotificationRepository:
         self.session = session
 
 
-    async def create_notifications(self, company_id: int, quiz_id:int) -> List[Notification]:
-
-        action_repository = ActionRepository(database=self.session)
-        users = await action_repository.get_users_in_company(company_id=company_id)
-        notifications = []
-        for user in users.users:
-            notification = Notification(
-                status="UNREAD",
-                text=f"New quiz for company {company_id} has been created",
-                user_id=user.id,
-                timestamp=datetime.utcnow()
-            )
-            notifications.append(notification)
-            self.session.add(notification)
-            await self.session.commit()
-        return notifications
+    async def create_notifications(self, company_id: int, quiz_id:int) -> int:
+        # One INSERT ... SELECT over the memberships, however many members the company has
+        members = select(
+            Action.user_id,
+            literal("UNREAD", Notification.status.type),
+            literal(f"New quiz for company {company_id} has been created")
+        ).where(and_(Action.type_of_action == "MEMBER", Action.company_id == company_id))
+        statement = insert(Notification).from_select(["user_id", "status", "text"], members)
+        result = await self.session.execute(statement)
+        await self.session.commit()
+        return result.rowcount
 
     async def get_notification(self, notification_id: int) -> Notification:
         query = select(Notification).filter(Notification.id == notification_id)
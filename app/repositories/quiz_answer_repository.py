@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import List, AsyncIterator, Optional
+
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ENV import EXPORT_CHUNK_SIZE
+from models.Models import QuizAnswer
+
+
+class QuizAnswerRepository:
+    def __init__(self, database: AsyncSession):
+        self.async_session = database
+
+    async def add_answers(self, answers: List[dict]):
+        # Executemany INSERT in the caller's transaction, committed together with the QuizResult
+        if answers:
+            await self.async_session.execute(insert(QuizAnswer), answers)
+
+    @staticmethod
+    def answer_to_dict(answer: QuizAnswer) -> dict:
+        return {
+            "id": answer.id,
+            "user_id": answer.user_id,
+            "company_id": answer.company_id,
+            "quiz_id": answer.quiz_id,
+            "question": answer.question,
+            "option": answer.option,
+            "is_correct": answer.is_correct,
+            "time": answer.timestamp.isoformat()
+        }
+
+    async def iter_answers(self, owner_column, owner_id: int, date_from: Optional[datetime] = None,
+                           date_to: Optional[datetime] = None, after_timestamp: Optional[datetime] = None,
+                           after_id: Optional[int] = None, limit: Optional[int] = None,
+                           chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[dict]:
+        query = select(QuizAnswer).where(owner_column == owner_id)
+        if date_from:
+            query = query.where(QuizAnswer.timestamp >= date_from)
+        if date_to:
+            query = query.where(QuizAnswer.timestamp < date_to)
+        if after_timestamp is not None and after_id is not None:
+            # Keyset pagination on the (owner, timestamp, id) index
+            query = query.where(tuple_(QuizAnswer.timestamp, QuizAnswer.id) > tuple_(after_timestamp, after_id))
+        query = query.order_by(QuizAnswer.timestamp, QuizAnswer.id)
+        if limit:
+            query = query.limit(limit)
+
+        # Server-side cursor, rows are fetched from Postgres chunk_size at a time
+        answers = await self.async_session.stream_scalars(query.execution_options(yield_per=chunk_size))
+        async for answer in answers:
+            yield self.answer_to_dict(answer)
+
+    def iter_company_answers(self, company_id: int, **kwargs) -> AsyncIterator[dict]:
+        return self.iter_answers(QuizAnswer.company_id, company_id, **kwargs)
+
+    def iter_user_answers(self, user_id: int, **kwargs) -> AsyncIterator[dict]:
+        return self.iter_answers(QuizAnswer.user_id, user_id, **kwargs)
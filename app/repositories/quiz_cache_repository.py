@@ -0,0 +1,88 @@
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from ENV import QUIZ_CACHE_SIZE, QUIZ_CACHE_TTL_HOURS
+from db.get_db import get_redis
+
+CACHE_TTL_SECONDS = int(timedelta(hours=QUIZ_CACHE_TTL_HOURS).total_seconds())
+
+# (kind, id, version) -> cached response, least recently used first
+quiz_cache: "OrderedDict[tuple, BaseModel]" = OrderedDict()
+
+
+class QuizCacheRepository:
+    # The version is a random token replaced after every committed mutation. Readers fetch it
+    # before loading from Postgres, so stale content can only land under a retired version.
+
+    def __init__(self, redis_client: Redis = None):
+        self.redis_client = redis_client
+
+    async def connect(self):
+        if self.redis_client is None:
+            self.redis_client = await get_redis()
+
+    @staticmethod
+    def version_key(kind: str, id: int) -> str:
+        return f"quiz_cache_version:{kind}:{id}"
+
+    @staticmethod
+    def content_key(kind: str, id: int, version: str) -> str:
+        return f"quiz_cache:{kind}:{id}:{version}"
+
+    async def get_version(self, kind: str, id: int) -> str:
+        await self.connect()
+        version = await self.redis_client.get(self.version_key(kind, id))
+        if version is None:
+            await self.redis_client.set(self.version_key(kind, id), uuid.uuid4().hex, nx=True)
+            version = await self.redis_client.get(self.version_key(kind, id))
+        return version
+
+    async def bump(self, kind: str, id: int):
+        try:
+            await self.connect()
+            await self.redis_client.set(self.version_key(kind, id), uuid.uuid4().hex)
+        except Exception as e:
+            print(f"An error occurred while bumping the quiz cache version: {e}")
+
+    async def get_cached(self, kind: str, id: int, model: Type[BaseModel],
+                         loader: Callable[[], Awaitable[Optional[BaseModel]]]) -> Tuple[Optional[str], Optional[BaseModel]]:
+        try:
+            version = await self.get_version(kind, id)
+        except Exception as e:
+            print(f"An error occurred while reading the quiz cache version: {e}")
+            return None, await loader()
+
+        local_key = (kind, id, version)
+        content = quiz_cache.get(local_key)
+        if content is not None:
+            quiz_cache.move_to_end(local_key)
+            return version, content
+
+        try:
+            cached = await self.redis_client.get(self.content_key(kind, id, version))
+            if cached is not None:
+                content = model.model_validate_json(cached)
+        except Exception as e:
+            print(f"An error occurred while reading the quiz cache: {e}")
+            return None, await loader()
+
+        if content is None:
+            content = await loader()
+            if content is None:
+                return version, None
+            try:
+                await self.redis_client.set(self.content_key(kind, id, version), content.model_dump_json(),
+                                            ex=CACHE_TTL_SECONDS)
+            except Exception as e:
+                # The content was loaded after the version was read, so it is still valid for this version
+                print(f"An error occurred while saving the quiz cache: {e}")
+
+        quiz_cache[local_key] = content
+        while len(quiz_cache) > QUIZ_CACHE_SIZE:
+            quiz_cache.popitem(last=False)
+        return version, content
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from sqlalchemy import select, update, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.Models import QuizDue, Quiz
+from schemas.Quiz import DueQuiz, ListDueQuizzes
+
+
+def frequency_interval(frequency):
+    return func.make_interval(0, 0, 0, frequency)
+
+
+class QuizDueRepository:
+    def __init__(self, database: AsyncSession):
+        self.async_session = database
+
+    async def record_completion(self, user_id: int, quiz_id: int, completed_at: datetime):
+        # Runs in the caller's transaction, next to the QuizResult insert
+        due = select(
+            literal(user_id), Quiz.id, Quiz.company_id, literal(completed_at),
+            literal(completed_at) + frequency_interval(Quiz.frequency)
+        ).where(Quiz.id == quiz_id)
+        statement = insert(QuizDue).from_select(
+            ["user_id", "quiz_id", "company_id", "last_completed_at", "next_due_at"], due)
+        statement = statement.on_conflict_do_update(
+            index_elements=[QuizDue.user_id, QuizDue.quiz_id],
+            set_={
+                "last_completed_at": statement.excluded.last_completed_at,
+                "next_due_at": statement.excluded.next_due_at
+            })
+        await self.async_session.execute(statement)
+
+    async def reschedule_quiz(self, quiz_id: int, frequency: int):
+        await self.async_session.execute(
+            update(QuizDue).where(QuizDue.quiz_id == quiz_id).values(
+                next_due_at=QuizDue.last_completed_at + frequency_interval(frequency)))
+
+    async def get_due_quizzes(self, user_id: int, current_time: datetime) -> ListDueQuizzes:
+        try:
+            query = select(QuizDue.quiz_id, QuizDue.company_id, Quiz.title, QuizDue.last_completed_at,
+                           QuizDue.next_due_at) \
+                .join(Quiz, Quiz.id == QuizDue.quiz_id) \
+                .where(QuizDue.user_id == user_id, QuizDue.next_due_at <= current_time) \
+                .order_by(QuizDue.next_due_at)
+            result = await self.async_session.execute(query)
+            return ListDueQuizzes(quizzes=[DueQuiz(**row._mapping) for row in result])
+
+        except Exception as e:
+            print(f"An error occurred while fetching due quizzes: {e}")
@@ -1,13 +1,16 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from sqlalchemy import select, func, distinct, text, cast, Date, and_, distinct, desc, over
+from sqlalchemy import select, func, distinct, text, cast, Date, distinct, desc, over, literal, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
-from models.Models import QuizResult, User
+from models.Models import QuizResult, User, QuizResultAggregate
 from schemas.Company import CompanyUserLastCompletion, ListCompanyUserLastCompletion
 from schemas.Quiz import LastQuizCompletion, ListLastQuizCompletion
-from schemas.QuizResult import QuizResultAddRequest, QuizAverage, UserQuizAveragesResponse, Average
-from schemas.User import ListUsersAverages, UsersAverage
+from schemas.QuizResult import QuizResultAddRequest, QuizAverage, UserQuizAveragesResponse, Average, \
+    QuizAverageSeries, UserQuizAverageSeriesResponse, AnalyticsPoint, BucketedAnalyticsResponse
+from schemas.User import ListUsersAverages, UsersAverage, UsersAveragesCursor
 
 
 class QuizResultRepository:
@@ -23,19 +26,35 @@ class QuizResultRepository:
             print(f"An error occurred while creating the user: {e}")
             raise e
 
+    async def add_to_aggregates(self, user_id: int, company_id: int, correct_answers: int, questions: int):
+        # Runs in the caller's transaction so the aggregate moves together with the QuizResult insert
+        statement = insert(QuizResultAggregate).values(
+            user_id=user_id, company_id=company_id, ratio_sum=correct_answers / questions, attempts=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[QuizResultAggregate.user_id, QuizResultAggregate.company_id],
+            set_={
+                "ratio_sum": QuizResultAggregate.ratio_sum + statement.excluded.ratio_sum,
+                "attempts": QuizResultAggregate.attempts + 1
+            })
+        await self.async_session.execute(statement)
+
     async def calculate_user_averages(self, user_id: int, company_id: int = 0):
         try:
+            query = select(QuizResultAggregate).where(QuizResultAggregate.user_id == user_id)
+            aggregates = await self.async_session.execute(query)
+            aggregates = aggregates.scalars().all()
+
             average_company_rating = 0
             if company_id != 0:
-                company_query = select(func.avg((QuizResult.correct_answers/QuizResult.questions * 5)).label("average_company_rating")).where(
-                    QuizResult.user_id == user_id, QuizResult.company_id == company_id)
-                average_company_rating = await self.async_session.execute(company_query)
-                average_company_rating = average_company_rating.scalar_one_or_none()
+                average_company_rating = None
+                for aggregate in aggregates:
+                    if aggregate.company_id == company_id:
+                        average_company_rating = aggregate.ratio_sum / aggregate.attempts * 5
 
-            system_query = select(func.avg((QuizResult.correct_answers/QuizResult.questions * 5)).label("average_system_rating")).where(
-                QuizResult.user_id == user_id)
-            average_system_rating = await self.async_session.execute(system_query)
-            average_system_rating = average_system_rating.scalar_one_or_none()
+            average_system_rating = None
+            attempts = sum(aggregate.attempts for aggregate in aggregates)
+            if attempts:
+                average_system_rating = sum(aggregate.ratio_sum for aggregate in aggregates) / attempts * 5
 
             return {
                 "average_company_rating": average_company_rating,
@@ -77,29 +96,53 @@ class QuizResultRepository:
         except Exception as e:
             print(f"An error occurred while fetching last quiz completions: {e}")
 
-    async def get_all_users_averages(self, company_id: int) -> ListUsersAverages:
+    async def get_all_users_averages(self, company_id: int, date_from: Optional[datetime] = None,
+                                     date_to: Optional[datetime] = None, after_user_id: Optional[int] = None,
+                                     after_timestamp: Optional[datetime] = None, after_id: Optional[int] = None,
+                                     limit: int = 100) -> ListUsersAverages:
         try:
-            query = select(QuizResult).where(QuizResult.company_id == company_id)
-            results = await self.async_session.execute(query)
-            user_averages = results.scalars().all()
-
-            averages = []
-
-            total_questions = 0
-            correct_questions = 0
-
-            for user_average in user_averages:
-                user_id = str(user_average.user_id) + " " + str(user_average.timestamp)
-                total_questions += user_average.questions
-                correct_questions += user_average.correct_answers
-
-                if total_questions > 0:
-                    average_score = correct_questions / total_questions * 5
-                    time = str(user_average.timestamp)
-                    user_average_data = UsersAverage(user_id=user_id, average=average_score, time=time)
-                    averages.append(user_average_data)
+            # Running totals are taken over each user's whole history up to date_to,
+            # so the first point inside the window already carries the earlier attempts
+            user_window = {
+                "partition_by": QuizResult.user_id,
+                "order_by": (QuizResult.timestamp, QuizResult.id),
+                "rows": (None, 0)
+            }
+            running = select(
+                QuizResult.user_id,
+                QuizResult.timestamp,
+                QuizResult.id,
+                func.sum(QuizResult.correct_answers).over(**user_window).label("correct_answers"),
+                func.sum(QuizResult.questions).over(**user_window).label("questions")
+            ).where(QuizResult.company_id == company_id)
+            if date_to:
+                running = running.where(QuizResult.timestamp < date_to)
+            if after_user_id is not None:
+                # Whole partitions before the cursor are skipped, the window still sees each remaining user's history
+                running = running.where(QuizResult.user_id >= after_user_id)
+            running = running.subquery()
+
+            page_query = select(running).where(running.c.questions > 0)
+            if date_from:
+                page_query = page_query.where(running.c.timestamp >= date_from)
+            if after_user_id is not None:
+                page_query = page_query.where(tuple_(running.c.user_id, running.c.timestamp, running.c.id) >
+                                              tuple_(after_user_id, after_timestamp, after_id))
+            # Walks ix_quiz_results_company_id_user_id_timestamp in order and stops after limit rows
+            page_query = page_query.order_by(running.c.user_id, running.c.timestamp, running.c.id).limit(limit)
+            results = (await self.async_session.execute(page_query)).all()
+
+            averages = [
+                UsersAverage(user_id=str(row.user_id), average=row.correct_answers / row.questions * 5,
+                             time=str(row.timestamp))
+                for row in results
+            ]
+            next_cursor = None
+            if len(results) == limit:
+                last = results[-1]
+                next_cursor = UsersAveragesCursor(user_id=last.user_id, timestamp=last.timestamp, id=last.id)
 
-            return ListUsersAverages(averages=averages)
+            return ListUsersAverages(averages=averages, next_cursor=next_cursor)
 
         except Exception as e:
             print(f"An error occurred while fetching average scores over time: {e}")
@@ -108,46 +151,59 @@ class QuizResultRepository:
         averages = {}
 
         for quiz_average in result:
-            quiz_id = quiz_average.quiz_id
-            if quiz_id not in averages:
-                averages[quiz_id] = {
-                    "quiz_id": quiz_id,
-                    "average": "",
-                    "timestamp": "",
+            quiz = averages.get(quiz_average.quiz_id)
+            if quiz is None:
+                quiz = averages[quiz_average.quiz_id] = {
+                    "quiz_id": quiz_average.quiz_id,
+                    "average": [],
+                    "timestamp": [],
                     "total_questions": 0,
                     "total_correct_answers": 0
                 }
 
-            total_questions = averages.get(quiz_id, {}).get("total_questions", 0)
-            correct_questions = averages.get(quiz_id, {}).get("total_correct_answers", 0)
-
-            total_questions += quiz_average.questions
-            correct_questions += quiz_average.correct_answers
-
-            if total_questions > 0:
-                average = correct_questions / total_questions * 5
-                if averages.get(quiz_id, {}).get("average"):
-                    averages[quiz_id]["average"] += f", {average}"
-                else:
-                    averages[quiz_id]["average"] = str(average)
-
-            if averages.get(quiz_id, {}).get("timestamp"):
-                averages[quiz_id]["timestamp"] += f", {quiz_average.timestamp.strftime('%d/%m')}"
-            else:
-                averages[quiz_id]["timestamp"] = quiz_average.timestamp.strftime('%d/%m')
+            quiz["total_questions"] += quiz_average.questions
+            quiz["total_correct_answers"] += quiz_average.correct_answers
+            if quiz["total_questions"] > 0:
+                quiz["average"].append(str(quiz["total_correct_answers"] / quiz["total_questions"] * 5))
+            quiz["timestamp"].append(quiz_average.timestamp.strftime('%d/%m'))
+
+        return [
+            Average(**{**values, "average": ", ".join(values["average"]), "timestamp": ", ".join(values["timestamp"])})
+            for values in averages.values()
+        ]
+
+    def average_series(self, result) -> List[QuizAverageSeries]:
+        series = {}
+
+        for quiz_result in result:
+            quiz = series.get(quiz_result.quiz_id)
+            if quiz is None:
+                quiz = series[quiz_result.quiz_id] = {
+                    "quiz_id": quiz_result.quiz_id,
+                    "points": [],
+                    "total_questions": 0,
+                    "total_correct_answers": 0
+                }
 
-            averages[quiz_id]["total_questions"] = total_questions
-            averages[quiz_id]["total_correct_answers"] = correct_questions
+            quiz["total_questions"] += quiz_result.questions
+            quiz["total_correct_answers"] += quiz_result.correct_answers
+            if quiz["total_questions"] > 0:
+                quiz["points"].append(
+                    (quiz_result.timestamp, quiz["total_correct_answers"] / quiz["total_questions"] * 5))
 
-        average_objects = [Average(**values) for values in averages.values()]
+        return [QuizAverageSeries(**values) for values in series.values()]
 
-        return average_objects
+    async def get_user_results(self, user_id: int, company_id: Optional[int] = None):
+        query = select(QuizResult.quiz_id, QuizResult.timestamp, QuizResult.questions, QuizResult.correct_answers) \
+            .where(QuizResult.user_id == user_id)
+        if company_id is not None:
+            query = query.where(QuizResult.company_id == company_id)
+        result = await self.async_session.execute(query.order_by(QuizResult.timestamp, QuizResult.id))
+        return result.all()
 
     async def get_my_averages(self, user_id: int) -> UserQuizAveragesResponse:
         try:
-            query = select(QuizResult).where(QuizResult.user_id == user_id)
-            result = await self.async_session.execute(query)
-            result = result.scalars().all()
+            result = await self.get_user_results(user_id)
             averages = self.math(result=result)
 
             quiz_averages = [QuizAverage(Avges={value.quiz_id: value.dict() for value in averages})]
@@ -159,9 +215,7 @@ class QuizResultRepository:
 
     async def get_user_quiz_averages(self, user_id: int, company_id: int) -> UserQuizAveragesResponse:
         try:
-            query = select(QuizResult).where(and_(QuizResult.user_id == user_id, QuizResult.company_id == company_id))
-            result = await self.async_session.execute(query)
-            result = result.scalars().all()
+            result = await self.get_user_results(user_id, company_id)
             averages = self.math(result=result)
 
             quiz_averages = [QuizAverage(Avges={value.quiz_id: value.dict() for value in averages})]
@@ -171,6 +225,54 @@ class QuizResultRepository:
         except Exception as e:
             print(f"No data found for the specified conditions. {e}")
 
+    async def get_my_average_series(self, user_id: int) -> UserQuizAverageSeriesResponse:
+        try:
+            result = await self.get_user_results(user_id)
+            return UserQuizAverageSeriesResponse(quizzes=self.average_series(result))
+
+        except Exception as e:
+            print(f"An error occurred while fetching average scores over time: {e}")
+
+    async def get_user_quiz_average_series(self, user_id: int, company_id: int) -> UserQuizAverageSeriesResponse:
+        try:
+            result = await self.get_user_results(user_id, company_id)
+            return UserQuizAverageSeriesResponse(quizzes=self.average_series(result))
+
+        except Exception as e:
+            print(f"No data found for the specified conditions. {e}")
+
+    async def get_bucketed_averages(self, bucket: str, company_id: int, user_id: Optional[int] = None,
+                                    quiz_id: Optional[int] = None, date_from: Optional[datetime] = None,
+                                    date_to: Optional[datetime] = None) -> BucketedAnalyticsResponse:
+        try:
+            # Rendered inline so the SELECT and GROUP BY expressions are identical to Postgres
+            bucket_start = func.date_trunc(literal(bucket, literal_execute=True), QuizResult.timestamp).label("time")
+            query = select(
+                bucket_start,
+                func.count().label("attempts"),
+                func.sum(QuizResult.correct_answers).label("correct_answers"),
+                func.sum(QuizResult.questions).label("questions")
+            ).where(QuizResult.company_id == company_id, QuizResult.questions > 0)
+            if user_id is not None:
+                query = query.where(QuizResult.user_id == user_id)
+            if quiz_id is not None:
+                query = query.where(QuizResult.quiz_id == quiz_id)
+            if date_from:
+                query = query.where(QuizResult.timestamp >= date_from)
+            if date_to:
+                query = query.where(QuizResult.timestamp < date_to)
+            query = query.group_by(bucket_start).order_by(bucket_start)
+
+            results = await self.async_session.execute(query)
+            points = [
+                AnalyticsPoint(time=row.time, attempts=row.attempts, average=row.correct_answers / row.questions * 5)
+                for row in results
+            ]
+            return BucketedAnalyticsResponse(bucket=bucket, points=points)
+
+        except Exception as e:
+            print(f"An error occurred while fetching bucketed analytics: {e}")
+
     async def get_company_users_last_completion(self, company_id: int) -> ListCompanyUserLastCompletion:
         try:
             last_completion_query = select(
@@ -1,18 +1,24 @@
 from datetime import datetime
-from typing import List
+from typing import List, Dict, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_
+from sqlalchemy import select, delete, and_, insert, update
+from sqlalchemy.orm import selectinload
 
 from models.Models import Quiz, Question, Option, QuizResult, User, Notification
 from repositories.action_repository import logger
+from repositories.answer_key_repository import AnswerKeyRepository
+from repositories.leaderboard_repository import LeaderboardRepository
 from repositories.notification_repository import NotificationRepository
+from repositories.quiz_answer_repository import QuizAnswerRepository
+from repositories.quiz_cache_repository import QuizCacheRepository
+from repositories.quiz_due_repository import QuizDueRepository
 from repositories.quiz_result_repository import QuizResultRepository
 from repositories.redis_repository import RedisRepository
 from schemas.Option import OptionResponse, OptionAddRequest, OptionUpdateScheme
-from schemas.Question import QuestionListResponse, QuestionUpdateScheme, QuestionTakeQuiz
+from schemas.Question import QuestionListResponse, QuestionUpdateScheme
 from schemas.Quiz import QuizResponse, QuestionResponse, QuizListResponse, DeleteScheme, QuizAddRequest, \
-    QuizUpdateScheme
+    QuizUpdateScheme, QuizTreeResponse
 
 
 class QuizzRepository:
@@ -35,29 +41,27 @@ class QuizzRepository:
                 company_id=quiz.company_id
             )
             self.async_session.add(quizToAdd)
-            await self.async_session.commit()
-
-            await self.async_session.refresh(quizToAdd)
-
-            for question in quiz.questions:
-                questionToAdd = Question(text=question.question, quiz_id=quizToAdd.id)
-                self.async_session.add(questionToAdd)
-                await self.async_session.commit()
+            await self.async_session.flush()
 
-                await self.async_session.refresh(questionToAdd)
+            # One INSERT ... RETURNING for all questions, ids come back in parameter order
+            question_ids = await self.async_session.scalars(
+                insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                [{"text": question.question, "quiz_id": quizToAdd.id} for question in quiz.questions]
+            )
 
-                options = [
-                    Option(text=option.text, question_id=questionToAdd.id, is_correct=option.is_correct)
-                    for option in question.options
-                ]
-                self.async_session.add_all(options)
-                await self.async_session.commit()
+            await self.async_session.execute(insert(Option), [
+                {"text": option.text, "question_id": question_id, "is_correct": option.is_correct}
+                for question_id, question in zip(question_ids.all(), quiz.questions)
+                for option in question.options
+            ])
 
             await self.async_session.commit()
+            await self.invalidate_quiz(None, company_id=quizToAdd.company_id)
 
             return self.quiz_to_response(quizToAdd)
 
         except Exception as e:
+            await self.async_session.rollback()
             print("Error:", str(e))
 
     @staticmethod
@@ -98,15 +102,45 @@ class QuizzRepository:
         except Exception as e:
             print(f"Error: {e}")
 
+    async def get_quiz_tree(self, quiz_id: int) -> QuizTreeResponse:
+        query = select(Quiz).options(selectinload(Quiz.question).selectinload(Question.option)).filter(
+            Quiz.id == quiz_id)
+        quiz = await self.async_session.execute(query)
+        quiz = quiz.scalar_one_or_none()
+        if quiz:
+            return QuizTreeResponse(
+                **self.quiz_to_response(quiz).model_dump(),
+                questions=[
+                    self.question_to_response(question, [self.option_to_response(option) for option in question.option])
+                    for question in quiz.question
+                ]
+            )
+
+    async def get_cached_quiz_tree(self, quiz_id: int) -> Tuple[Optional[str], Optional[QuizTreeResponse]]:
+        return await QuizCacheRepository().get_cached(
+            "quiz", quiz_id, QuizTreeResponse, lambda: self.get_quiz_tree(quiz_id))
+
+    async def get_cached_quizzes(self, company_id: int) -> Tuple[Optional[str], Optional[QuizListResponse]]:
+        return await QuizCacheRepository().get_cached(
+            "company", company_id, QuizListResponse, lambda: self.get_quizzes(company_id))
+
+    async def quiz_id_for_question(self, question_id: int) -> Optional[int]:
+        query = select(Question.quiz_id).where(Question.id == question_id)
+        return (await self.async_session.execute(query)).scalar_one_or_none()
+
+    async def invalidate_quiz(self, quiz_id: Optional[int], company_id: Optional[int] = None):
+        quiz_cache_repository = QuizCacheRepository()
+        if quiz_id is not None:
+            await quiz_cache_repository.bump("quiz", quiz_id)
+        if company_id is not None:
+            await quiz_cache_repository.bump("company", company_id)
+
     async def get_quizzes(self, company_id: int) -> QuizListResponse:
         try:
             query = select(Quiz).filter(Quiz.company_id == company_id)
             quizzes = await self.async_session.execute(query)
             quizzes = quizzes.scalars().all()
-            quizzes_retrieved = []
-            for quiz in quizzes:
-                quiz_rep = await self.get_quiz(quiz.id)
-                quizzes_retrieved.append(quiz_rep)
+            quizzes_retrieved = [self.quiz_to_response(quiz) for quiz in quizzes]
             return QuizListResponse(quizzes=quizzes_retrieved)
 
         except Exception as e:
@@ -114,21 +148,14 @@ class QuizzRepository:
 
     async def get_questions(self, quiz_id: int) -> QuestionListResponse:
         try:
-            query = select(Question).filter(Question.quiz_id == quiz_id)
+            # Options of all questions are loaded with one extra SELECT ... WHERE question_id IN (...)
+            query = select(Question).options(selectinload(Question.option)).filter(Question.quiz_id == quiz_id)
             questions = await self.async_session.execute(query)
             questions = questions.scalars().all()
-            questions_with_options = []
-
-            for question in questions:
-                options_query = select(Option).filter(Option.question_id == question.id)
-                options = await self.async_session.execute(options_query)
-                options = options.scalars().all()
-                question_options = [self.option_to_response(option) for option in options]
-                questions_with_options.append((question, question_options))
 
             questions_responses = [
-                self.question_to_response(question, options)
-                for question, options in questions_with_options
+                self.question_to_response(question, [self.option_to_response(option) for option in question.option])
+                for question in questions
             ]
 
             return QuestionListResponse(questions=questions_responses)
@@ -145,6 +172,7 @@ class QuizzRepository:
                 option_to_update.text = option.text
                 option_to_update.is_correct = option.is_correct
                 await self.async_session.commit()
+                await self.invalidate_quiz(await self.quiz_id_for_question(option_to_update.question_id))
             return self.option_to_response(option_to_update)
         except Exception as e:
             print(f"Error: {e}")
@@ -161,48 +189,137 @@ class QuizzRepository:
                 options = options.scalars().all()
                 options_to_resp = [self.option_to_response(option) for option in options]
                 await self.async_session.commit()
+                await self.invalidate_quiz(question_to_update.quiz_id)
                 return self.question_to_response(question_to_update, options_to_resp)
         except Exception as e:
             print(f"Error: {e}")
 
-    async def update_quiz(self, quiz: QuizUpdateScheme) -> QuizResponse:
+    async def update_quiz(self, quiz: QuizUpdateScheme) -> QuizTreeResponse:
         try:
-            # Select and update the quiz
-            query = select(Quiz).filter(Quiz.id == quiz.id)
+            query = select(Quiz).options(selectinload(Quiz.question).selectinload(Question.option)).filter(
+                Quiz.id == quiz.id)
             quiz_to_update = await self.async_session.execute(query)
             quiz_to_update = quiz_to_update.scalar_one_or_none()
 
             if quiz_to_update:
-                quiz_to_update.title = quiz.title
-                quiz_to_update.description = quiz.description
-                quiz_to_update.frequency = quiz.frequency
-
-                await self.update_questions(quiz=quiz)
+                quiz_values = {"title": quiz.title, "description": quiz.description, "frequency": quiz.frequency}
+                # Read before the UPDATE, which synchronizes the new values into quiz_to_update
+                old_frequency = quiz_to_update.frequency
+                if any(getattr(quiz_to_update, key) != value for key, value in quiz_values.items()):
+                    await self.async_session.execute(update(Quiz).where(Quiz.id == quiz.id).values(**quiz_values))
+                if old_frequency != quiz.frequency:
+                    await QuizDueRepository(database=self.async_session).reschedule_quiz(quiz.id, quiz.frequency)
+
+                questions = await self.update_questions(quiz_to_update, quiz)
                 await self.async_session.commit()
-                return self.quiz_to_response(quiz_to_update)
+                await self.invalidate_quiz(quiz.id, company_id=quiz_to_update.company_id)
+                return QuizTreeResponse(id=quiz.id, company_id=quiz_to_update.company_id, questions=questions,
+                                        **quiz_values)
 
         except Exception as e:
+            await self.async_session.rollback()
             print(f"Error: {e}")
 
+    async def update_questions(self, quiz_to_update: Quiz, quiz: QuizUpdateScheme) -> List[QuestionResponse]:
+        existing_questions = {question.id: question for question in quiz_to_update.question}
+        # Snapshot of the stored tree, the response is this tree with the payload applied
+        stored_tree = [(question.id, question.text, [(option.id, option.text) for option in question.option])
+                       for question in quiz_to_update.question]
+        question_updates, option_updates = [], []
+        new_questions, new_options = [], []
+        delete_question_ids, delete_option_ids = set(), set()
+        # Response entries, (question payload, question id or None, [(option payload, option id or None)])
+        tree = []
 
-    async def update_questions(self, quiz):
         for updated_question in quiz.questions:
-            question_to_update = await self.async_session.execute(
-                select(Question).filter(Question.id == updated_question.id))
-            question_to_update = question_to_update.scalar_one_or_none()
-            if question_to_update:
-                question_to_update.text = updated_question.text
-                await self.update_options(updated_question)
-
-    async def update_options(self, updated_question):
-        for updated_option in updated_question.options:
-            option_to_update = await self.async_session.execute(
-                select(Option).filter(Option.id == updated_option.id))
-            option_to_update = option_to_update.scalar_one_or_none()
-            if option_to_update:
-                option_to_update.text = updated_option.text
-                option_to_update.is_correct = updated_option.is_correct
+            question = existing_questions.get(updated_question.id)
+            if updated_question.id is not None and question is None:
+                # Ids of other quizzes are never touched
+                continue
+            if question is None:
+                new_questions.append(updated_question)
+                tree.append((updated_question, None, [(option, None) for option in updated_question.options]))
+                continue
+
+            if question.text != updated_question.text:
+                question_updates.append({"id": question.id, "text": updated_question.text})
+
+            existing_options = {option.id: option for option in question.option}
+            options = []
+            for updated_option in updated_question.options:
+                option = existing_options.get(updated_option.id)
+                if updated_option.id is not None and option is None:
+                    continue
+                if option is None:
+                    new_options.append((question.id, updated_option))
+                    options.append((updated_option, None))
+                    continue
+                if option.text != updated_option.text or option.is_correct != updated_option.is_correct:
+                    option_updates.append({"id": option.id, "text": updated_option.text,
+                                           "is_correct": updated_option.is_correct})
+                options.append((updated_option, option.id))
+
+            if quiz.delete_missing:
+                delete_option_ids.update(existing_options.keys() - {option_id for _, option_id in options})
+            tree.append((updated_question, question.id, options))
+
+        if quiz.delete_missing:
+            delete_question_ids = existing_questions.keys() - {question_id for _, question_id, _ in tree}
+
+        if delete_question_ids or delete_option_ids:
+            await self.async_session.execute(delete(Option).where(
+                Option.id.in_(list(delete_option_ids)) | Option.question_id.in_(list(delete_question_ids))))
+        if delete_question_ids:
+            await self.async_session.execute(delete(Question).where(Question.id.in_(list(delete_question_ids))))
+        if question_updates:
+            await self.async_session.execute(update(Question), question_updates)
+        if option_updates:
+            await self.async_session.execute(update(Option), option_updates)
+
+        if new_questions:
+            new_question_ids = await self.async_session.scalars(
+                insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                [{"text": question.text, "quiz_id": quiz.id} for question in new_questions])
+            new_question_ids = iter(new_question_ids.all())
+            resolved_tree = []
+            for question, question_id, options in tree:
+                if question_id is None:
+                    question_id = next(new_question_ids)
+                    new_options += [(question_id, option) for option, _ in options]
+                resolved_tree.append((question, question_id, options))
+            tree = resolved_tree
+
+        if new_options:
+            new_option_ids = await self.async_session.scalars(
+                insert(Option).returning(Option.id, sort_by_parameter_order=True),
+                [{"text": option.text, "is_correct": option.is_correct, "question_id": question_id}
+                 for question_id, option in new_options])
+            new_option_ids = dict(zip((id(option) for _, option in new_options), new_option_ids.all()))
+        else:
+            new_option_ids = {}
+
+        payload_tree = {question_id: (question, options) for question, question_id, options in tree}
+        questions = []
+        for question_id, text, stored_options in stored_tree:
+            if question_id in delete_question_ids:
+                continue
+            question, options = payload_tree.pop(question_id, (None, []))
+            updated_options = {option_id: option for option, option_id in options if option_id is not None}
+            option_responses = [
+                OptionResponse(id=option_id, text=updated_options[option_id].text
+                               if option_id in updated_options else option_text)
+                for option_id, option_text in stored_options if option_id not in delete_option_ids
+            ]
+            option_responses += [OptionResponse(id=new_option_ids[id(option)], text=option.text)
+                                 for option, option_id in options if option_id is None]
+            questions.append(QuestionResponse(id=question_id, text=question.text if question else text,
+                                              quiz_id=quiz.id, options=option_responses))
 
+        for question_id, (question, options) in payload_tree.items():
+            questions.append(QuestionResponse(id=question_id, text=question.text, quiz_id=quiz.id, options=[
+                OptionResponse(id=new_option_ids[id(option)], text=option.text) for option, _ in options
+            ]))
+        return questions
 
     async def delete_quiz(self, quiz_id: int):
         try:
@@ -215,9 +332,11 @@ class QuizzRepository:
                     id=-1
                 )
 
+            company_id = quiz.company_id
             await self.async_session.delete(quiz)
 
             await self.async_session.commit()
+            await self.invalidate_quiz(quiz_id, company_id=company_id)
 
             logger.info(f"Quiz was deleted ID: {quiz_id}")
             return DeleteScheme(
@@ -238,9 +357,11 @@ class QuizzRepository:
                     id=-1
                 )
 
+            quiz_id = question.quiz_id
             await self.async_session.delete(question)
 
             await self.async_session.commit()
+            await self.invalidate_quiz(quiz_id)
 
             logger.info(f"Question was deleted ID: {question_id}")
             return DeleteScheme(
@@ -262,9 +383,11 @@ class QuizzRepository:
                     id=-1
                 )
 
+            question_id = option.question_id
             await self.async_session.delete(option)
 
             await self.async_session.commit()
+            await self.invalidate_quiz(await self.quiz_id_for_question(question_id))
 
             logger.info(f"Option was deleted ID: {option_id}")
             return DeleteScheme(
@@ -274,53 +397,79 @@ class QuizzRepository:
         except Exception as e:
             print(f"An error occurred while deleting option: {e}")
 
-    async def take_quiz(self, quiz_id: int, questions: List[QuestionTakeQuiz], company_id: int, user_id: int) -> dict:
+    async def take_quiz(self, quiz_id: int, answers: Dict[int, int], company_id: int, user_id: int) -> dict:
         try:
-            correct_answers = 0
-            total_questions = len(questions)
-            query = select(Option).filter(Option.is_correct)
-            correct_options = await self.async_session.execute(query)
-            correct_options = correct_options.scalars().all()
-            correct_options_text = {option.text for option in correct_options}
-            for question in questions:
-                if question.option.text in correct_options_text:
-                    correct_answers += 1
+            answer_key = await AnswerKeyRepository(database=self.async_session).get_answer_key(quiz_id)
+            # Unanswered questions count as wrong
+            total_questions = len(answer_key.questions)
+            graded = [
+                {
+                    "question_id": question_id,
+                    "option_id": option_id,
+                    "question": answer_key.questions[question_id],
+                    "option": answer_key.options[option_id].text,
+                    "is_correct": answer_key.is_correct(question_id, option_id)
+                }
+                for question_id, option_id in answers.items()
+            ]
+            correct_answers = sum(answer["is_correct"] for answer in graded)
 
+            answered_at = datetime.utcnow()
             quiz_result = QuizResult(
                 user_id=user_id,
                 company_id=company_id,
                 correct_answers=correct_answers,
                 questions=total_questions,
-                timestamp=datetime.utcnow(),
+                timestamp=answered_at,
                 quiz_id=quiz_id
             )
 
             self.async_session.add(quiz_result)
-            await self.async_session.commit()
-
+            await self.async_session.flush()
+
+            quiz_answer_rep = QuizAnswerRepository(database=self.async_session)
+            await quiz_answer_rep.add_answers([
+                {
+                    "quiz_result_id": quiz_result.id,
+                    "company_id": company_id,
+                    "user_id": user_id,
+                    "quiz_id": quiz_id,
+                    "timestamp": answered_at,
+                    **answer
+                }
+                for answer in graded
+            ])
             quiz_result_rep = QuizResultRepository(database=self.async_session)
+            await quiz_result_rep.add_to_aggregates(user_id, company_id, correct_answers, total_questions)
+            await QuizDueRepository(database=self.async_session).record_completion(user_id, quiz_id, answered_at)
+            await self.async_session.commit()
 
             user_averages = await quiz_result_rep.calculate_user_averages(user_id, company_id)
             try:
+                quiz_data_list = [
+                    {
+                        "user_id": user_id,
+                        "company_id": company_id,
+                        "quiz_id": quiz_id,
+                        "question": answer["question"],
+                        "option": answer["option"],
+                        "is_correct": str(answer["is_correct"]),
+                        "time": answered_at.isoformat()
+                    }
+                    for answer in graded
+                ]
                 async with RedisRepository() as redis_rep:
-                    for question in questions:
-                        is_correct = False
-                        if question.option.text in correct_options_text:
-                            is_correct = True
-                        quiz_data = {
-                            "user_id": user_id,
-                            "company_id": company_id,
-                            "quiz_id": quiz_id,
-                            "question": question.text,
-                            "option": question.option.text,
-                            "is_correct": str(is_correct),
-                            "time": datetime.utcnow().isoformat()
-                        }
-                        await redis_rep.save_quiz(quiz_data)
-                        print("Quiz data saved to Redis")
+                    await redis_rep.save_quiz_batch(quiz_data_list)
+                print("Quiz data saved to Redis")
             except Exception as e:
                 print(f"An error occurred while using RedisRepository: {e}")
 
+            try:
+                await LeaderboardRepository().update_user(user_id, company_id, user_averages["average_company_rating"],
+                                                          user_averages["average_system_rating"])
+            except Exception as e:
+                print(f"An error occurred while updating leaderboards: {e}")
+
             return {
                 "correct_answers": correct_answers,
                 "total_questions": total_questions,
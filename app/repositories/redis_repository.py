@@ -1,57 +1,123 @@
+import time
 import uuid
 from datetime import timedelta
+from typing import List, AsyncIterator
 
+from redis.asyncio import Redis
 
+from ENV import EXPORT_CHUNK_SIZE
 from db.get_db import get_redis
 
+RESULT_TTL_SECONDS = int(timedelta(hours=48).total_seconds())
+
 
 class RedisRepository:
-    def __init__(self):
-        self.redis_client = None
+    def __init__(self, redis_client: Redis = None):
+        self.redis_client = redis_client
 
     async def connect(self):
-        self.redis_client = await get_redis()
+        if self.redis_client is None:
+            self.redis_client = await get_redis()
 
     async def disconnect(self):
         if self.redis_client:
-            self.redis_client.close()
+            # Only releases the client, the connection pool is owned by the app lifespan
+            await self.redis_client.close()
+            self.redis_client = None
 
-    async def save_quiz(self, quiz_data: dict):
-        await self.connect()
+    @staticmethod
+    def user_index_key(user_id) -> str:
+        return f"quiz_result_index:user:{user_id}"
 
-        redis_key = f"quiz_result:{quiz_data['company_id']}:{quiz_data['user_id']}:{quiz_data['quiz_id']}:{uuid.uuid4()}"
+    @staticmethod
+    def company_index_key(company_id) -> str:
+        return f"quiz_result_index:company:{company_id}"
 
-        self.redis_client.hmset(redis_key, quiz_data)
-        expiration_time_seconds = int(timedelta(hours=48).total_seconds())
-        self.redis_client.expire(redis_key, expiration_time_seconds)
+    async def save_quiz(self, quiz_data: dict):
+        await self.save_quiz_batch([quiz_data])
 
-    async def get_user_results_from_database(self, user_id):
+    async def save_quiz_batch(self, quiz_data_list: List[dict]):
+        if not quiz_data_list:
+            return
         await self.connect()
-        redis_key_pattern = f"quiz_result:*:{user_id}:*"
-
-        matching_keys = self.redis_client.keys(redis_key_pattern)
 
-        user_results = []
+        now = time.time()
+        index_keys = set()
+
+        # Hashes, TTLs and index entries of one attempt go out in a single MULTI/EXEC round trip
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for quiz_data in quiz_data_list:
+                redis_key = f"quiz_result:{quiz_data['company_id']}:{quiz_data['user_id']}:{quiz_data['quiz_id']}:{uuid.uuid4()}"
+                pipe.hset(redis_key, mapping=quiz_data)
+                pipe.expire(redis_key, RESULT_TTL_SECONDS)
+                for index_key in (self.user_index_key(quiz_data["user_id"]),
+                                  self.company_index_key(quiz_data["company_id"])):
+                    pipe.zadd(index_key, {redis_key: now})
+                    index_keys.add(index_key)
+
+            for index_key in index_keys:
+                pipe.zremrangebyscore(index_key, "-inf", now - RESULT_TTL_SECONDS)
+                pipe.expire(index_key, RESULT_TTL_SECONDS)
+            await pipe.execute()
+
+    async def count_indexed_results(self, index_key: str) -> int:
+        await self.connect()
+        return await self.redis_client.zcount(index_key, time.time() - RESULT_TTL_SECONDS, "+inf")
 
-        for redis_key in matching_keys:
-            quiz_data = self.redis_client.hgetall(redis_key)
-            user_results.append(quiz_data)
+    async def iter_indexed_results(self, index_key: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[dict]:
+        await self.connect()
+        now = time.time()
+        # Paged by score rather than offset, save_quiz_batch prunes expired entries from the front concurrently
+        lower = now - RESULT_TTL_SECONDS
+
+        while True:
+            entries = await self.redis_client.zrangebyscore(
+                index_key, lower, now, start=0, num=chunk_size, withscores=True)
+            if not entries:
+                return
+
+            redis_keys = [redis_key for redis_key, score in entries]
+            last_score = entries[-1][1]
+            if len(entries) == chunk_size:
+                # All entries of one batch share a score, so the rest of a group the page cut through is read now
+                seen = {redis_key for redis_key, score in entries if score == last_score}
+                tied = await self.redis_client.zrangebyscore(index_key, last_score, last_score)
+                redis_keys.extend(redis_key for redis_key in tied if redis_key not in seen)
+
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for redis_key in redis_keys:
+                    pipe.hgetall(redis_key)
+                results = await pipe.execute()
+
+            # A hash can expire a moment before its index entry is pruned
+            for quiz_data in results:
+                if quiz_data:
+                    yield quiz_data
+
+            if len(entries) < chunk_size:
+                return
+            lower = f"({last_score!r}"
+
+    async def get_indexed_results(self, index_key: str) -> list:
+        return [quiz_data async for quiz_data in self.iter_indexed_results(index_key)]
 
-        return user_results
+    async def get_user_results_from_database(self, user_id):
+        return await self.get_indexed_results(self.user_index_key(user_id))
 
     async def get_company_results(self, company_id):
-        await self.connect()
-        redis_key_pattern = f"quiz_result:{company_id}:*"
+        return await self.get_indexed_results(self.company_index_key(company_id))
 
-        matching_keys = self.redis_client.keys(redis_key_pattern)
+    async def count_user_results(self, user_id) -> int:
+        return await self.count_indexed_results(self.user_index_key(user_id))
 
-        company_results = []
+    async def count_company_results(self, company_id) -> int:
+        return await self.count_indexed_results(self.company_index_key(company_id))
 
-        for redis_key in matching_keys:
-            quiz_data = self.redis_client.hgetall(redis_key)
-            company_results.append(quiz_data)
+    def iter_user_results(self, user_id) -> AsyncIterator[dict]:
+        return self.iter_indexed_results(self.user_index_key(user_id))
 
-        return company_results
+    def iter_company_results(self, company_id) -> AsyncIterator[dict]:
+        return self.iter_indexed_results(self.company_index_key(company_id))
 
 
     async def __aenter__(self):
@@ -60,4 +126,3 @@ class RedisRepository:
 
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.disconnect()
-
@@ -0,0 +1,86 @@
+from datetime import datetime, date
+from typing import Optional
+
+from sqlalchemy import select, delete, func, literal, cast, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ENV import REMINDER_SHARDS, REMINDER_CHUNK_SIZE
+from models.Models import Notification, Quiz, QuizDue, ReminderCheckpoint, SentReminder
+
+# First key of the two-key advisory lock, the shard number is the second
+REMINDER_LOCK_KEY = 7301
+
+
+class ReminderRepository:
+    def __init__(self, database: AsyncSession):
+        self.async_session = database
+
+    async def create_quiz_reminders(self, current_time: datetime, *conditions) -> int:
+        # A (user, quiz) pair is reminded once per due period: the ledger insert skips pairs
+        # already reminded for their current next_due_at and only the new ledger rows become notifications
+        sent = insert(SentReminder).from_select(
+            ["user_id", "quiz_id", "due_period"],
+            select(QuizDue.user_id, QuizDue.quiz_id, QuizDue.next_due_at)
+            .where(QuizDue.next_due_at <= current_time, *conditions)
+        ).on_conflict_do_nothing().returning(SentReminder.user_id, SentReminder.quiz_id).cte("sent")
+
+        reminders = select(
+            sent.c.user_id,
+            literal("UNREAD", Notification.status.type),
+            literal("Вы не проходили квиз '") + Quiz.title + "' в течение " + cast(Quiz.frequency, String) + " дней!"
+        ).join(Quiz, Quiz.id == sent.c.quiz_id)
+
+        statement = insert(Notification).from_select(["user_id", "status", "text"], reminders).add_cte(sent)
+        result = await self.async_session.execute(statement)
+        return result.rowcount
+
+    async def process_shard_chunk(self, run_date: date, shard: int, current_time: datetime,
+                                  shards: int = REMINDER_SHARDS, chunk_size: int = REMINDER_CHUNK_SIZE) -> Optional[bool]:
+        # None when another worker holds the shard, otherwise whether the shard is finished for run_date.
+        # The lock, the reminders and the checkpoint share one transaction, so a crash resumes after the last chunk
+        try:
+            locked = await self.async_session.scalar(
+                select(func.pg_try_advisory_xact_lock(REMINDER_LOCK_KEY, shard)))
+            if not locked:
+                await self.async_session.rollback()
+                return None
+
+            checkpoint = await self.async_session.scalar(
+                select(ReminderCheckpoint).where(ReminderCheckpoint.run_date == run_date,
+                                                 ReminderCheckpoint.shard == shard))
+            if checkpoint and checkpoint.done:
+                await self.async_session.rollback()
+                return True
+            last_user_id = checkpoint.last_user_id if checkpoint else 0
+
+            in_shard = QuizDue.user_id % shards == shard
+            user_ids = await self.async_session.scalars(
+                select(QuizDue.user_id).distinct()
+                .where(QuizDue.next_due_at <= current_time, in_shard, QuizDue.user_id > last_user_id)
+                .order_by(QuizDue.user_id).limit(chunk_size))
+            user_ids = user_ids.all()
+
+            if user_ids:
+                await self.create_quiz_reminders(current_time, in_shard, QuizDue.user_id > last_user_id,
+                                                 QuizDue.user_id <= user_ids[-1])
+                last_user_id = user_ids[-1]
+
+            done = len(user_ids) < chunk_size
+            statement = insert(ReminderCheckpoint).values(run_date=run_date, shard=shard,
+                                                          last_user_id=last_user_id, done=done)
+            statement = statement.on_conflict_do_update(
+                index_elements=[ReminderCheckpoint.run_date, ReminderCheckpoint.shard],
+                set_={"last_user_id": statement.excluded.last_user_id, "done": statement.excluded.done})
+            await self.async_session.execute(statement)
+            await self.async_session.commit()
+            return done
+
+        except Exception as e:
+            await self.async_session.rollback()
+            print(f"An error occurred while sending reminders for shard {shard}: {e}")
+            raise e
+
+    async def remove_checkpoints_before(self, run_date: date):
+        await self.async_session.execute(delete(ReminderCheckpoint).where(ReminderCheckpoint.run_date < run_date))
+        await self.async_session.commit()
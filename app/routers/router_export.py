@@ -1,20 +1,31 @@
-import json
+from datetime import datetime
+from typing import Optional
+
 import os
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header
 from fastapi.responses import JSONResponse, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.get_db import get_redis, get_db
 from repositories.action_repository import ActionRepository
 from repositories.company_repository import CompanyRepository
+from repositories.export_job_repository import ExportJobRepository
 from repositories.export_repository import ExportRepository
+from repositories.quiz_answer_repository import QuizAnswerRepository
 from repositories.redis_repository import RedisRepository
+from schemas.ExportJob import ExportJobRequest, ExportJobResponse
 from schemas.User import UserResponse
 from utils.auth import get_current_user
+from utils.pagination import check_cursor
 
 router_export = APIRouter()
 
+COLUMNAR_FORMATS = ["parquet", "arrow"]
+EXPORT_FORMATS = ["json", "csv", "ndjson"] + COLUMNAR_FORMATS
+HISTORY_FORMATS = ["csv", "ndjson"] + COLUMNAR_FORMATS
+JOB_FORMATS = ["csv", "ndjson"]
+
 
 @router_export.get("/export/user-results/{user_id}/{format}", tags=["ExportData"])
 async def export_user_results(
@@ -24,23 +35,22 @@ async def export_user_results(
 ):
 
     if user_id == current_user.id:
-        if format not in ["json", "csv"]:
+        if format not in EXPORT_FORMATS:
             raise HTTPException(status_code=400, detail="Invalid format")
         redis_repository = RedisRepository()
         export_repository = ExportRepository()
-        user_results = await redis_repository.get_user_results_from_database(user_id=user_id)
-        if not user_results:
+        if not await redis_repository.count_user_results(user_id=user_id):
             raise HTTPException(status_code=404, detail="User results not found")
 
-        if format == "json":
-            with open("user_result.json", "w") as json_file:
-                json.dump(user_results, json_file)
-                os.remove("user_result.json")
-            return JSONResponse(content=user_results)
-
-        elif format == "csv":
-            content = user_results
-            return content
+        user_results = redis_repository.iter_user_results(user_id=user_id)
+        if format == "csv":
+            return export_repository.generate_csv_response(user_results, filename=f"user_{user_id}_results.csv")
+        elif format == "ndjson":
+            return export_repository.generate_ndjson_response(user_results)
+        elif format in COLUMNAR_FORMATS:
+            return export_repository.generate_columnar_response(user_results, format,
+                                                                filename=f"user_{user_id}_results.{format}")
+        return JSONResponse(content=[user_result async for user_result in user_results])
     raise HTTPException(status_code=403, detail="You are not allowed to export quizzes of this user")
 
 
@@ -51,7 +61,7 @@ async def export_company_results(
         current_user: UserResponse = Depends(get_current_user),
         db:AsyncSession = Depends(get_db)
 ):
-    if format not in ["json", "csv"]:
+    if format not in EXPORT_FORMATS:
         raise HTTPException(status_code=400, detail="Invalid format")
 
     company_repository = CompanyRepository(database=db)
@@ -63,16 +73,135 @@ async def export_company_results(
         if company.owner_id == current_user.id or current_user.id in admin_ids:
             redis_repository = RedisRepository()
             export_repository = ExportRepository()
-            company_results = await redis_repository.get_company_results(company_id=company_id)
-
-            if not company_results:
+            if not await redis_repository.count_company_results(company_id=company_id):
                 raise HTTPException(status_code=404, detail="No results found")
 
-            if format == "json":
-                with open("company_result.json", "w") as json_file:
-                    json.dump(company_results, json_file)
-                    os.remove("company_result.json")
-                return JSONResponse(content=company_results)
-            elif format == "csv":
-                return company_results
-    raise HTTPException(status_code=403, detail="You are not allowed to check all company quizzes")
\ No newline at end of file
+            company_results = redis_repository.iter_company_results(company_id=company_id)
+            if format == "csv":
+                return export_repository.generate_csv_response(company_results,
+                                                               filename=f"company_{company_id}_results.csv")
+            elif format == "ndjson":
+                return export_repository.generate_ndjson_response(company_results)
+            elif format in COLUMNAR_FORMATS:
+                return export_repository.generate_columnar_response(company_results, format,
+                                                                    filename=f"company_{company_id}_results.{format}")
+            return JSONResponse(content=[company_result async for company_result in company_results])
+    raise HTTPException(status_code=403, detail="You are not allowed to check all company quizzes")
+
+
+def history_response(answers, format: str, filename: str):
+    export_repository = ExportRepository()
+    if format == "csv":
+        return export_repository.generate_csv_response(answers, filename=f"{filename}.csv")
+    elif format in COLUMNAR_FORMATS:
+        return export_repository.generate_columnar_response(answers, format, filename=f"{filename}.{format}")
+    return export_repository.generate_ndjson_response(answers)
+
+
+@router_export.get("/export/user-history/{user_id}/{format}", tags=["ExportData"])
+async def export_user_history(
+        user_id: int,
+        format: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        after_timestamp: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    if user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not allowed to export quizzes of this user")
+    if format not in HISTORY_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    check_cursor(after_timestamp=after_timestamp, after_id=after_id)
+
+    quiz_answer_repository = QuizAnswerRepository(database=db)
+    answers = quiz_answer_repository.iter_user_answers(
+        user_id, date_from=date_from, date_to=date_to, after_timestamp=after_timestamp, after_id=after_id, limit=limit)
+    return history_response(answers, format, filename=f"user_{user_id}_history")
+
+
+@router_export.get("/export/company-history/{company_id}/{format}", tags=["ExportData"])
+async def export_company_history(
+        company_id: int,
+        format: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        after_timestamp: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    if format not in HISTORY_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    check_cursor(after_timestamp=after_timestamp, after_id=after_id)
+
+    company_repository = CompanyRepository(database=db)
+    company = await company_repository.get_company(id=company_id)
+    action_repository = ActionRepository(database=db)
+    admins = await action_repository.get_all_admins(company_id=company_id, per_page=5, page=1)
+    admin_ids = [admin.id for admin in admins.users] if admins else []
+    if not company or (company.owner_id != current_user.id and current_user.id not in admin_ids):
+        raise HTTPException(status_code=403, detail="You are not allowed to check all company quizzes")
+
+    quiz_answer_repository = QuizAnswerRepository(database=db)
+    answers = quiz_answer_repository.iter_company_answers(
+        company_id, date_from=date_from, date_to=date_to, after_timestamp=after_timestamp, after_id=after_id, limit=limit)
+    return history_response(answers, format, filename=f"company_{company_id}_history")
+
+
+@router_export.post("/export/jobs", tags=["ExportData"], response_model=ExportJobResponse, status_code=202)
+async def create_export_job(
+        request: ExportJobRequest,
+        background_tasks: BackgroundTasks,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    if request.format not in JOB_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    company_repository = CompanyRepository(database=db)
+    company = await company_repository.get_company(id=request.company_id)
+    action_repository = ActionRepository(database=db)
+    admins = await action_repository.get_all_admins(company_id=request.company_id, per_page=5, page=1)
+    admin_ids = [admin.id for admin in admins.users] if admins else []
+    if not company or (company.owner_id != current_user.id and current_user.id not in admin_ids):
+        raise HTTPException(status_code=403, detail="You are not allowed to check all company quizzes")
+
+    export_job_repository = ExportJobRepository()
+    job = await export_job_repository.create_job(request, user_id=current_user.id)
+    background_tasks.add_task(export_job_repository.run_job, job.id)
+    return job
+
+
+async def get_own_job(job_id: str, current_user: UserResponse) -> dict:
+    export_job_repository = ExportJobRepository()
+    job = await export_job_repository.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if int(job["user_id"]) != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not allowed to access this export job")
+    return job
+
+
+@router_export.get("/export/jobs/{job_id}", tags=["ExportData"], response_model=ExportJobResponse)
+async def get_export_job(job_id: str, current_user: UserResponse = Depends(get_current_user)):
+    job = await get_own_job(job_id, current_user)
+    return ExportJobRepository.job_to_response(job_id, job)
+
+
+@router_export.get("/export/jobs/{job_id}/download", tags=["ExportData"])
+async def download_export_job(job_id: str, range: Optional[str] = Header(default=None),
+                              current_user: UserResponse = Depends(get_current_user)):
+    job = await get_own_job(job_id, current_user)
+    if job["status"] != "DONE":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+
+    path = ExportJobRepository.artifact_path(job_id, job["format"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Export artifact has expired")
+    export_repository = ExportRepository()
+    return export_repository.generate_file_response(
+        path, filename=f"company_{job['company_id']}_history.{job['format']}.gz", range_header=range)
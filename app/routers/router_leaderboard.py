@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.get_db import get_db
+from repositories.action_repository import ActionRepository
+from repositories.company_repository import CompanyRepository
+from repositories.leaderboard_repository import LeaderboardRepository
+from schemas.Leaderboard import LeaderboardResponse, LeaderboardRankResponse
+from schemas.User import UserResponse
+from utils.auth import get_current_user
+
+router_leaderboard = APIRouter()
+
+
+async def check_company_access(company_id: int, db: AsyncSession, current_user: UserResponse):
+    company_repository = CompanyRepository(database=db)
+    company = await company_repository.get_company(id=company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    if company.owner_id == current_user.id:
+        return company
+    action_repository = ActionRepository(database=db)
+    if not await action_repository.if_member(user_id=current_user.id, company_id=company_id):
+        raise HTTPException(status_code=403, detail="You are not a member of this company")
+    return company
+
+
+@router_leaderboard.get("/leaderboard", tags=["Leaderboard"], response_model=LeaderboardResponse)
+async def get_global_leaderboard(limit: int = Query(10, ge=1, le=100), current_user: UserResponse = Depends(get_current_user)):
+    return await LeaderboardRepository().get_top(limit=limit)
+
+
+@router_leaderboard.get("/leaderboard/me", tags=["Leaderboard"], response_model=LeaderboardRankResponse)
+async def get_my_global_rank(current_user: UserResponse = Depends(get_current_user)):
+    return await LeaderboardRepository().get_rank(user_id=current_user.id)
+
+
+@router_leaderboard.get("/company/{company_id}/leaderboard", tags=["Leaderboard"], response_model=LeaderboardResponse)
+async def get_company_leaderboard(company_id: int, limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db),
+                                  current_user: UserResponse = Depends(get_current_user)):
+    await check_company_access(company_id, db, current_user)
+    return await LeaderboardRepository().get_top(company_id=company_id, limit=limit)
+
+
+@router_leaderboard.get("/company/{company_id}/leaderboard/user/{user_id}", tags=["Leaderboard"], response_model=LeaderboardRankResponse)
+async def get_company_rank(company_id: int, user_id: int, db: AsyncSession = Depends(get_db),
+                           current_user: UserResponse = Depends(get_current_user)):
+    await check_company_access(company_id, db, current_user)
+    return await LeaderboardRepository().get_rank(user_id=user_id, company_id=company_id)
+
+
+@router_leaderboard.post("/company/{company_id}/leaderboard/rebuild", tags=["Leaderboard"], response_model=LeaderboardResponse)
+async def rebuild_company_leaderboard(company_id: int, db: AsyncSession = Depends(get_db),
+                                      current_user: UserResponse = Depends(get_current_user)):
+    company_repository = CompanyRepository(database=db)
+    company = await company_repository.get_company(id=company_id)
+    if company.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not an owner")
+    leaderboard_repository = LeaderboardRepository()
+    if await leaderboard_repository.rebuild(db, company_id=company_id) is None:
+        raise HTTPException(status_code=409, detail="A leaderboard rebuild is already running")
+    return await leaderboard_repository.get_top(company_id=company_id)
@@ -1,27 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.get_db import get_db
 from repositories.action_repository import ActionRepository
 from repositories.company_repository import CompanyRepository
+from repositories.quiz_due_repository import QuizDueRepository
 from repositories.quiz_result_repository import QuizResultRepository
 from schemas.Company import ListCompanyUserLastCompletion
-from schemas.Quiz import ListLastQuizCompletion
-from schemas.QuizResult import UserQuizAveragesResponse
+from schemas.Quiz import ListLastQuizCompletion, ListDueQuizzes
+from schemas.QuizResult import UserQuizAveragesResponse, UserQuizAverageSeriesResponse, AnalyticsBucket, \
+    BucketedAnalyticsResponse
 from schemas.User import UserResponse, ListUsersAverages
 from utils.auth import get_current_user
+from utils.pagination import check_cursor
 
 router_quiz_result = APIRouter()
 
 
 @router_quiz_result.get("/company/{company_id}/users/analytics", tags=["Analytics"], response_model=ListUsersAverages)
-async def get_users_analytics(company_id: int, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+async def get_users_analytics(company_id: int, date_from: Optional[datetime] = Query(None), date_to: Optional[datetime] = Query(None),
+                              after_user_id: Optional[int] = Query(None), after_timestamp: Optional[datetime] = Query(None),
+                              after_id: Optional[int] = Query(None), limit: int = Query(100, ge=1, le=1000),
+                              db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    check_cursor(after_user_id=after_user_id, after_timestamp=after_timestamp, after_id=after_id)
     company_repo = CompanyRepository(database=db)
     company = await company_repo.get_company(id=company_id)
     if company.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="You are not an owner")
     quiz_res_repo = QuizResultRepository(database=db)
-    return await quiz_res_repo.get_all_users_averages(company_id=company_id)
+    return await quiz_res_repo.get_all_users_averages(company_id=company_id, date_from=date_from, date_to=date_to,
+                                                      after_user_id=after_user_id, after_timestamp=after_timestamp,
+                                                      after_id=after_id, limit=limit)
 
 
 @router_quiz_result.get("/company/{company_id}/user/{user_id}/quizzes-averages", tags=["Analytics"], response_model=UserQuizAveragesResponse)
@@ -40,12 +52,34 @@ async def get_my_averages(db: AsyncSession = Depends(get_db), current_user: User
     return await quiz_res_repo.get_my_averages(user_id=current_user.id)
 
 
+@router_quiz_result.get("/company/{company_id}/user/{user_id}/quizzes-averages/series", tags=["Analytics"], response_model=UserQuizAverageSeriesResponse)
+async def get_member_quizzes_average_series(company_id: int, user_id: int, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    company_repo = CompanyRepository(database=db)
+    company = await company_repo.get_company(id=company_id)
+    if company.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not an owner")
+    quiz_res_repo = QuizResultRepository(database=db)
+    return await quiz_res_repo.get_user_quiz_average_series(user_id=user_id, company_id=company_id)
+
+
+@router_quiz_result.get("/user/me/quizzes-averages/series", tags=["Analytics"], response_model=UserQuizAverageSeriesResponse)
+async def get_my_average_series(db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    quiz_res_repo = QuizResultRepository(database=db)
+    return await quiz_res_repo.get_my_average_series(user_id=current_user.id)
+
+
 @router_quiz_result.get("/user/me/get-quizzes_and-times", tags=["Analytics"], response_model=ListLastQuizCompletion)
 async def get_my_quizzes_time(db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
     quiz_res_repo = QuizResultRepository(database=db)
     return await quiz_res_repo.get_last_quiz_completion(user_id=current_user.id)
 
 
+@router_quiz_result.get("/user/me/quizzes/due", tags=["Analytics"], response_model=ListDueQuizzes)
+async def get_my_due_quizzes(db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    quiz_due_repo = QuizDueRepository(database=db)
+    return await quiz_due_repo.get_due_quizzes(user_id=current_user.id, current_time=datetime.utcnow())
+
+
 @router_quiz_result.get("/company/{company_id}/get-last-time", tags=["Analytics"], response_model=ListCompanyUserLastCompletion)
 async def get_last_time_for_members(company_id:int, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
     company_repo = CompanyRepository(database=db)
@@ -56,3 +90,38 @@ async def get_last_time_for_members(company_id:int, db: AsyncSession = Depends(g
     return await quiz_res_repo.get_company_users_last_completion(company_id=company_id)
 
 
+async def get_owned_company(company_id: int, db: AsyncSession, current_user: UserResponse):
+    company_repo = CompanyRepository(database=db)
+    company = await company_repo.get_company(id=company_id)
+    if company.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not an owner")
+    return company
+
+
+@router_quiz_result.get("/company/{company_id}/analytics", tags=["Analytics"], response_model=BucketedAnalyticsResponse)
+async def get_company_analytics(company_id: int, bucket: AnalyticsBucket = Query("day"),
+                                date_from: Optional[datetime] = Query(None), date_to: Optional[datetime] = Query(None),
+                                db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    await get_owned_company(company_id, db, current_user)
+    quiz_res_repo = QuizResultRepository(database=db)
+    return await quiz_res_repo.get_bucketed_averages(bucket, company_id, date_from=date_from, date_to=date_to)
+
+
+@router_quiz_result.get("/company/{company_id}/user/{user_id}/analytics", tags=["Analytics"], response_model=BucketedAnalyticsResponse)
+async def get_member_analytics(company_id: int, user_id: int, bucket: AnalyticsBucket = Query("day"),
+                               date_from: Optional[datetime] = Query(None), date_to: Optional[datetime] = Query(None),
+                               db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    await get_owned_company(company_id, db, current_user)
+    quiz_res_repo = QuizResultRepository(database=db)
+    return await quiz_res_repo.get_bucketed_averages(bucket, company_id, user_id=user_id, date_from=date_from,
+                                                     date_to=date_to)
+
+
+@router_quiz_result.get("/company/{company_id}/quiz/{quiz_id}/analytics", tags=["Analytics"], response_model=BucketedAnalyticsResponse)
+async def get_quiz_analytics(company_id: int, quiz_id: int, bucket: AnalyticsBucket = Query("day"),
+                             date_from: Optional[datetime] = Query(None), date_to: Optional[datetime] = Query(None),
+                             db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    await get_owned_company(company_id, db, current_user)
+    quiz_res_repo = QuizResultRepository(database=db)
+    return await quiz_res_repo.get_bucketed_averages(bucket, company_id, quiz_id=quiz_id, date_from=date_from,
+                                                     date_to=date_to)
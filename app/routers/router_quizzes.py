@@ -1,24 +1,27 @@
 import logging
-from typing import List
+from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.get_db import get_db
 
 from repositories.action_repository import ActionRepository
+from repositories.answer_key_repository import AnswerKeyRepository
 from repositories.company_repository import CompanyRepository
 from repositories.notification_repository import NotificationRepository
 from repositories.quiz_result_repository import QuizResultRepository
 from repositories.quizzes_repository import QuizzRepository
 from schemas.Option import OptionUpdateScheme, OptionResponse
-from schemas.Question import QuestionListResponse, QuestionUpdateScheme, QuestionTakeQuiz
+from schemas.Question import QuestionListResponse, QuestionUpdateScheme, QuizSubmission, submission_to_answers
 
 from schemas.Quiz import QuizResponse, QuizListResponse, QuestionResponse, QuizAddRequest, QuizUpdateScheme, \
-    DeleteScheme
+    DeleteScheme, QuizTreeResponse
 
 from schemas.User import UserResponse
 from utils.auth import get_current_user
+from utils.pagination import check_cursor
 
 logger = logging.getLogger(__name__)
 router_quiz = APIRouter()
@@ -43,39 +46,52 @@ async def create_quiz(quiz: QuizAddRequest, db: AsyncSession = Depends(get_db),
             raise HTTPException(status_code=403, detail="You are not allowed to create quizzes")
 
 
+def etag_response(request: Request, response: Response, version: Optional[str]) -> Optional[Response]:
+    if version is None:
+        return None
+    etag = f'"{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
 @router_quiz.get("/company/{company_id}/get-quiz/{quiz_id}", response_model=QuizResponse, tags=["Quizzes"])
-async def get_quiz(company_id:int, quiz_id:int ,  db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+async def get_quiz(company_id:int, quiz_id:int, request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
     action_repository = ActionRepository(database=db)
     try:
         quiz_repository = QuizzRepository(database=db)
-        retrieved_quiz = await quiz_repository.get_quiz(id=quiz_id)
-        return retrieved_quiz
-    except HTTPException:
+        version, quiz_tree = await quiz_repository.get_cached_quiz_tree(quiz_id=quiz_id)
+        if not quiz_tree:
+            raise HTTPException(status_code=404, detail="Quiz wasn't found")
+        return etag_response(request, response, version) or QuizResponse(**quiz_tree.model_dump())
+    except HTTPException as e:
+        if e.status_code == 404:
+            raise
         raise HTTPException(status_code=403, detail="You are not a member of the company")
 
 
 @router_quiz.get("/company/{company_id}/get-quizzes/", response_model=QuizListResponse, tags=["Quizzes"])
-async def get_quizzes(company_id: int,  db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+async def get_quizzes(company_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
     action_repository = ActionRepository(database=db)
     quiz_repository = QuizzRepository(database=db)
     if action_repository.if_member(user_id=current_user.id, company_id=company_id):
-        retrieved_quizzes = await quiz_repository.get_quizzes(company_id=company_id)
+        version, retrieved_quizzes = await quiz_repository.get_cached_quizzes(company_id=company_id)
         if retrieved_quizzes:
-            return retrieved_quizzes
+            return etag_response(request, response, version) or retrieved_quizzes
     raise HTTPException(status_code=404, detail="None quizzes")
 
 @router_quiz.get("/company/{company_id}/quiz/{quiz_id}/questions", response_model=QuestionListResponse, tags=["Quizzes"])
-async def get_questions(company_id: int, quiz_id: int, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+async def get_questions(company_id: int, quiz_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
     action_repository = ActionRepository(database=db)
     quiz_repository = QuizzRepository(database=db)
     if action_repository.if_member(user_id=current_user.id, company_id=company_id):
-        questions = await quiz_repository.get_questions(quiz_id=quiz_id)
-        if questions:
-            return questions
+        version, quiz_tree = await quiz_repository.get_cached_quiz_tree(quiz_id=quiz_id)
+        if quiz_tree and quiz_tree.questions:
+            return etag_response(request, response, version) or QuestionListResponse(questions=quiz_tree.questions)
         raise HTTPException(status_code=404, detail="None questions for this quiz")
 
 
-@router_quiz.post("/company/{company_id}/quiz/update", response_model=QuizResponse, tags=["Quizzes"])
+@router_quiz.post("/company/{company_id}/quiz/update", response_model=QuizTreeResponse, tags=["Quizzes"])
 async def update_quiz(company_id: int, quiz:QuizUpdateScheme, db:AsyncSession = Depends(get_db), current_user:UserResponse =Depends(get_current_user)):
     company_repository = CompanyRepository(database=db)
     company = await company_repository.get_company(id=company_id)
@@ -174,16 +190,33 @@ async def delete_option(company_id: int, option_id: int,
 
 
 @router_quiz.post("/company/{company_id}/quiz/{quiz_id}/take-quiz", tags=["Quizzes"])
-async def take_quiz(company_id: int, quiz_id: int, questions: List[QuestionTakeQuiz], db:AsyncSession = Depends(get_db),
+async def take_quiz(company_id: int, quiz_id: int, submission: QuizSubmission, db:AsyncSession = Depends(get_db),
                     current_user: UserResponse = Depends(get_current_user)) -> dict:
+    answers = submission_to_answers(submission)
+    answer_key_repository = AnswerKeyRepository(database=db)
+    answer_key = await answer_key_repository.get_answer_key(quiz_id)
+    if answer_key.company_id != company_id or not answer_key.questions:
+        raise HTTPException(status_code=404, detail="Quiz wasn't found")
+    if not answers:
+        raise HTTPException(status_code=400, detail="Submission has no answers")
+    error = answer_key_repository.validate_submission(answer_key, answers)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+    unanswered = answer_key_repository.unanswered_questions(answer_key, answers)
+    if unanswered:
+        raise HTTPException(status_code=400, detail=f"Questions {sorted(unanswered)} are not answered")
     quizzes_repository = QuizzRepository(database=db)
-    ratings = await quizzes_repository.take_quiz(quiz_id=quiz_id, questions=questions, company_id=company_id, user_id=current_user.id)
+    ratings = await quizzes_repository.take_quiz(quiz_id=quiz_id, answers=answers, company_id=company_id, user_id=current_user.id)
     return ratings
 
 
 
 @router_quiz.get("company/{company_id}/users/averages", tags=["User"])
-async def get_all_users_averages(company_id:int, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+async def get_all_users_averages(company_id:int, date_from: Optional[datetime] = Query(None), date_to: Optional[datetime] = Query(None),
+                                 after_user_id: Optional[int] = Query(None), after_timestamp: Optional[datetime] = Query(None),
+                                 after_id: Optional[int] = Query(None), limit: int = Query(100, ge=1, le=1000),
+                                 db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    check_cursor(after_user_id=after_user_id, after_timestamp=after_timestamp, after_id=after_id)
     company_repository = CompanyRepository(database=db)
     company = await company_repository.get_company(id=company_id)
     action_repository = ActionRepository(database=db)
@@ -192,7 +225,9 @@ async def get_all_users_averages(company_id:int, db: AsyncSession = Depends(get_
         admin_ids = [admin.id for admin in admins.users]
         if company.owner_id == current_user.id or current_user.id in admin_ids:
             quiz_result_repository = QuizResultRepository(database=db)
-            averages = await quiz_result_repository.get_all_users_averages()
+            averages = await quiz_result_repository.get_all_users_averages(
+                company_id=company_id, date_from=date_from, date_to=date_to, after_user_id=after_user_id,
+                after_timestamp=after_timestamp, after_id=after_id, limit=limit)
             return averages
 
 @router_quiz.get("company/{company_id}/users/{user_id}/quizzes/averages", tags=["User"], )
@@ -206,7 +241,7 @@ async def get_user_quiz_averages(company_id:int, user_id: int, db: AsyncSession
         if company.owner_id == current_user.id or current_user.id in admin_ids:
             quiz_result_repository = QuizResultRepository(database=db)
 
-            user_averages = await quiz_result_repository.get_user_quiz_averages(user_id=user_id)
+            user_averages = await quiz_result_repository.get_user_quiz_averages(user_id=user_id, company_id=company_id)
             return user_averages
 
 @router_quiz.get("company/{company_id}/users/last-completions", tags=["Company"])
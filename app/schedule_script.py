@@ -1,69 +1,42 @@
 import asyncio
-from sqlalchemy import select, and_
+import random
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime, timedelta
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, aliased
-from contextlib import asynccontextmanager
-from ENV import DB_URL_CONNECT, DB_URL_CONNECT_SCRIPT
-from models.Models import Quiz, User, QuizResult, Notification
-from sqlalchemy import cast, DateTime
+from ENV import DB_URL_CONNECT_SCRIPT, REMINDER_SHARDS, REMINDER_RETRY_SECONDS
+from db.connect import init_engine, connect_Postgres
 
-from repositories.quiz_result_repository import QuizResultRepository
-
-
-@asynccontextmanager
-async def connect_to_postgres():
-    database_url = DB_URL_CONNECT_SCRIPT
-    engine = create_async_engine(database_url, future=True, echo=True)
-
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_session() as session:
-        yield session
+from repositories.reminder_repository import ReminderRepository
 
 
 async def send_notifications():
+    # Any number of these workers can run at once, shards are claimed with advisory locks
     current_time = datetime.utcnow()
-
-    async with connect_to_postgres() as session:
-        query = select(Quiz)
-        quizzes = await session.execute(query)
-        quizzes = quizzes.scalars().all()
-
-        for quiz in quizzes:
-
-            query = (
-                select(User)
-                .join(QuizResult, and_(
-                    User.id == QuizResult.user_id,
-                    QuizResult.quiz_id == quiz.id,
-                    cast(QuizResult.timestamp, DateTime) <= (current_time - timedelta(days=quiz.frequency))
-                ))
-            )
-
-            users_passed_quiz = await session.execute(query)
-            users_passed_quiz = users_passed_quiz.scalars().all()
-
-            for user in users_passed_quiz:
-                quiz_result_repo = QuizResultRepository(database=session)
-                last_completions = await quiz_result_repo.get_last_quiz_completion(user.id)
-                for last_completion in last_completions:
-                    last_completion_time = last_completion
-                    print(last_completion_time)
-                    if not last_completion_time or last_completion_time < (
-                            current_time - timedelta(days=quiz.frequency)):
-                        notification = Notification(
-                            text=f"Вы не проходили квиз '{quiz.title}' в течение {quiz.frequency} дней!",
-                            status="UNREAD",
-                            user_id=user.id,
-                        )
-                        session.add(notification)
-                        await session.commit()
+    run_date = current_time.date()
+    offset = random.randrange(REMINDER_SHARDS)
+    pending = set(range(REMINDER_SHARDS))
+
+    while pending:
+        progressed = False
+        for shard in sorted(pending, key=lambda shard: (shard - offset) % REMINDER_SHARDS):
+            async with await connect_Postgres() as session:
+                done = await ReminderRepository(session).process_shard_chunk(run_date, shard, current_time)
+            if done is None:
+                continue
+            progressed = True
+            if done:
+                pending.discard(shard)
+        if pending and not progressed:
+            await asyncio.sleep(REMINDER_RETRY_SECONDS)
+
+    async with await connect_Postgres() as session:
+        await ReminderRepository(session).remove_checkpoints_before(run_date - timedelta(days=7))
+    print(f"Quiz reminders for {run_date} are sent")
 
 if __name__ == '__main__':
+    init_engine(DB_URL_CONNECT_SCRIPT)
     scheduler = AsyncIOScheduler()
 
-    scheduler.add_job(send_notifications, 'interval', hours=24)
+    scheduler.add_job(send_notifications, 'interval', hours=24, next_run_time=datetime.now())
 
     scheduler.start()
 
@@ -0,0 +1,20 @@
+from typing import Dict, Optional, Set
+
+from pydantic import BaseModel
+
+
+class AnswerKeyOption(BaseModel):
+    question_id: int
+    text: str
+    is_correct: bool
+
+
+class AnswerKey(BaseModel):
+    quiz_id: int
+    company_id: Optional[int]
+    questions: Dict[int, str]
+    options: Dict[int, AnswerKeyOption]
+    correct: Dict[int, Set[int]]
+
+    def is_correct(self, question_id: int, option_id: int) -> bool:
+        return option_id in self.correct.get(question_id, ())
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ExportJobRequest(BaseModel):
+    company_id: int
+    format: str
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    status: str
+    company_id: int
+    format: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    rows: int = 0
+    size: int = 0
+    error: Optional[str] = None
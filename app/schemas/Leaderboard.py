@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class LeaderboardEntry(BaseModel):
+    user_id: int
+    rating: float
+    rank: int
+
+
+class LeaderboardResponse(BaseModel):
+    entries: List[LeaderboardEntry]
+    total: int
+
+
+class LeaderboardRankResponse(BaseModel):
+    user_id: int
+    rating: Optional[float]
+    rank: Optional[int]
+    total: int
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -19,6 +19,12 @@ class OptionUpdateScheme(BaseModel):
     question_id:int
     is_correct: bool
 
+class OptionTreeUpdateScheme(BaseModel):
+    id: Optional[int] = None
+    text: str
+    is_correct: bool
+
+
 class OptionListResponse(BaseModel):
     options: List[OptionResponse]
 
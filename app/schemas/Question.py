@@ -1,8 +1,8 @@
-from typing import List
+from typing import List, Dict, Union, Optional
 
 from pydantic import BaseModel
 
-from schemas.Option import OptionAddRequest, OptionResponse, OptionUpdateScheme
+from schemas.Option import OptionAddRequest, OptionResponse, OptionUpdateScheme, OptionTreeUpdateScheme
 
 
 class QuestionAddRequest(BaseModel):
@@ -15,6 +15,12 @@ class QuestionUpdateScheme(BaseModel):
     options: List[OptionUpdateScheme]
 
 
+class QuestionTreeUpdateScheme(BaseModel):
+    id: Optional[int] = None
+    text: str
+    options: List[OptionTreeUpdateScheme]
+
+
 class QuestionResponse(BaseModel):
     id: int
     text: str
@@ -33,6 +39,16 @@ class QuestionListTakeQuiz(BaseModel):
     questions: List[QuestionTakeQuiz]
 
 
+# {question_id: option_id}, the legacy list of echoed questions is still accepted
+QuizSubmission = Union[Dict[int, int], List[QuestionTakeQuiz]]
+
+
+def submission_to_answers(submission: QuizSubmission) -> Dict[int, int]:
+    if isinstance(submission, dict):
+        return submission
+    return {question.id: question.option.id for question in submission}
+
+
 
 
 class QuestionListResponse(BaseModel):
@@ -1,8 +1,9 @@
+from datetime import datetime
 from typing import List
 
 from pydantic import BaseModel
 
-from schemas.Question import QuestionAddRequest, QuestionResponse, QuestionUpdateScheme
+from schemas.Question import QuestionAddRequest, QuestionResponse, QuestionTreeUpdateScheme
 
 
 class QuizAddRequest(BaseModel):
@@ -21,6 +22,10 @@ class QuizResponse(BaseModel):
     company_id: int
 
 
+class QuizTreeResponse(QuizResponse):
+    questions: List[QuestionResponse]
+
+
 class QuizListResponse(BaseModel):
     quizzes: List[QuizResponse]
 
@@ -30,7 +35,9 @@ class QuizUpdateScheme(BaseModel):
     title: str
     description: str
     frequency: int
-    questions: List[QuestionUpdateScheme]
+    questions: List[QuestionTreeUpdateScheme]
+    # Questions and options of the quiz that are missing from the payload get deleted
+    delete_missing: bool = False
 
 
 class DeleteScheme(BaseModel):
@@ -45,3 +52,15 @@ class LastQuizCompletion(BaseModel):
 
 class ListLastQuizCompletion(BaseModel):
     completions: List[LastQuizCompletion]
+
+
+class DueQuiz(BaseModel):
+    quiz_id: int
+    company_id: int
+    title: str
+    last_completed_at: datetime
+    next_due_at: datetime
+
+
+class ListDueQuizzes(BaseModel):
+    quizzes: List[DueQuiz]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple, Literal
 
 from pydantic import BaseModel
 
@@ -24,4 +24,29 @@ class QuizAverage(BaseModel):
     Avges: Dict[int, Average]
 
 class UserQuizAveragesResponse(BaseModel):
-    averages: List[QuizAverage]
\ No newline at end of file
+    averages: List[QuizAverage]
+
+
+class QuizAverageSeries(BaseModel):
+    quiz_id: int
+    points: List[Tuple[datetime, float]]
+    total_questions: int
+    total_correct_answers: int
+
+
+class UserQuizAverageSeriesResponse(BaseModel):
+    quizzes: List[QuizAverageSeries]
+
+
+AnalyticsBucket = Literal["hour", "day", "week", "month"]
+
+
+class AnalyticsPoint(BaseModel):
+    time: datetime
+    attempts: int
+    average: float
+
+
+class BucketedAnalyticsResponse(BaseModel):
+    bucket: AnalyticsBucket
+    points: List[AnalyticsPoint]
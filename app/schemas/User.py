@@ -1,4 +1,5 @@
 
+from datetime import datetime
 from typing import List, Union, Optional
 from pydantic import BaseModel, EmailStr
 
@@ -87,8 +88,15 @@ class UsersAverage(BaseModel):
     time: str
 
 
+class UsersAveragesCursor(BaseModel):
+    user_id: int
+    timestamp: datetime
+    id: int
+
+
 class ListUsersAverages(BaseModel):
     averages: List[UsersAverage]
+    next_cursor: Optional[UsersAveragesCursor]
 
 
 class MyAverages(BaseModel):
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from db.get_db import get_db
+from repositories import quiz_cache_repository, answer_key_repository
+from schemas.User import UserResponse
+from utils.auth import get_current_user
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    async def get_redis():
+        raise ConnectionError("Redis is disabled in this test")
+
+    # Without Redis every cached read falls through to the database
+    monkeypatch.setattr(quiz_cache_repository, "get_redis", get_redis)
+    monkeypatch.setattr(answer_key_repository, "get_redis", get_redis)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def async_session(engine):
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def create_tables(engine):
+    def create_tables(*models):
+        async def create():
+            async with engine.begin() as connection:
+                await connection.run_sync(
+                    lambda sync_connection: [model.__table__.create(sync_connection) for model in models])
+
+        asyncio.run(create())
+
+    return create_tables
+
+
+@pytest.fixture
+def client(async_session):
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    async def override_get_current_user():
+        return UserResponse(id=1, username="test", email="test@example.com", password="test", city="test",
+                            country="test", phone=None, status=True, roles=["user"])
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
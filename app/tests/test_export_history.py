@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from models.Models import QuizAnswer
+from repositories.quiz_answer_repository import QuizAnswerRepository
+from utils.pagination import check_cursor
+
+
+@pytest.fixture
+def history(async_session, create_tables):
+    create_tables(QuizAnswer)
+
+    async def seed():
+        async with async_session() as session:
+            session.add_all([
+                QuizAnswer(id=answer_id, quiz_result_id=1, company_id=1, user_id=1, quiz_id=1, question_id=1,
+                           option_id=1, question="question", option="option", is_correct=True,
+                           timestamp=datetime(2023, 1, answer_id))
+                for answer_id in (1, 2, 3)
+            ])
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+def test_iter_answers_applies_cursor_with_zero_id(async_session, history):
+    async def fetch():
+        async with async_session() as session:
+            answers = QuizAnswerRepository(database=session).iter_user_answers(
+                1, after_timestamp=datetime(2023, 1, 2), after_id=0)
+            return [answer["id"] async for answer in answers]
+
+    assert asyncio.run(fetch()) == [2, 3]
+
+
+def test_partial_cursor_is_rejected():
+    check_cursor(after_timestamp=None, after_id=None)
+    check_cursor(after_timestamp=datetime(2023, 1, 2), after_id=0)
+    with pytest.raises(HTTPException) as error:
+        check_cursor(after_timestamp=datetime(2023, 1, 2), after_id=None)
+    assert error.value.status_code == 400
@@ -0,0 +1,29 @@
+import asyncio
+
+from repositories import export_job_repository
+from repositories.export_job_repository import ExportJobRepository
+
+
+def test_run_job_finishes_when_artifact_cleanup_fails(tmp_path, monkeypatch):
+    updates = []
+
+    async def get_job(self, job_id):
+        return {"format": "csv", "company_id": "1", "date_from": "", "date_to": ""}
+
+    async def update_job(self, job_id, **fields):
+        updates.append(fields["status"])
+
+    def remove_expired_artifacts():
+        raise PermissionError("export directory is read-only")
+
+    async def connect_Postgres():
+        raise ConnectionError("Postgres is disabled in this test")
+
+    monkeypatch.setattr(ExportJobRepository, "get_job", get_job)
+    monkeypatch.setattr(ExportJobRepository, "update_job", update_job)
+    monkeypatch.setattr(ExportJobRepository, "remove_expired_artifacts", staticmethod(remove_expired_artifacts))
+    monkeypatch.setattr(export_job_repository, "connect_Postgres", connect_Postgres)
+    monkeypatch.setattr(export_job_repository, "EXPORT_JOB_DIR", str(tmp_path))
+
+    asyncio.run(ExportJobRepository().run_job("job"))
+    assert updates == ["RUNNING", "FAILED"]
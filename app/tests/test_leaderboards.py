@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fakeredis import aioredis
+
+from models.Models import QuizResultAggregate
+from repositories.leaderboard_repository import LeaderboardRepository, REBUILD_KEY
+
+
+@pytest.fixture(autouse=True)
+def aggregates(async_session, create_tables):
+    create_tables(QuizResultAggregate)
+
+    async def seed():
+        async with async_session() as session:
+            session.add_all([
+                QuizResultAggregate(user_id=user_id, company_id=1, ratio_sum=0.5, attempts=1) for user_id in (1, 2)
+            ])
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+def test_scores_submitted_during_rebuild_survive_the_swap(async_session):
+    async def run():
+        redis_client = aioredis.FakeRedis(decode_responses=True)
+        repository = LeaderboardRepository(redis_client)
+        await redis_client.zadd(repository.company_key(9), {7: 1.0})
+        overlapping = []
+
+        async with async_session() as session:
+            stream_scalars = session.stream_scalars
+
+            async def stream_with_submissions(query):
+                aggregates = await stream_scalars(query)
+
+                async def submit_midway():
+                    submitted = False
+                    async for aggregate in aggregates:
+                        if not submitted:
+                            # User 1 improves and user 3 takes a first quiz in a company the rebuild has not seen
+                            await LeaderboardRepository(redis_client).update_user(1, 1, 4.0, 4.5)
+                            await LeaderboardRepository(redis_client).update_user(3, 2, 3.0, 3.0)
+                            overlapping.append(await LeaderboardRepository(redis_client).rebuild(session))
+                            submitted = True
+                        yield aggregate
+
+                return submit_midway()
+
+            session.stream_scalars = stream_with_submissions
+            users = await repository.rebuild(session)
+
+        boards = {key: await redis_client.zrange(key, 0, -1, withscores=True)
+                  for key in await redis_client.keys("leaderboard:*")}
+        return users, overlapping, boards
+
+    users, overlapping, boards = asyncio.run(run())
+    assert users == 2
+    assert overlapping == [None]
+    assert boards == {
+        LeaderboardRepository.company_key(1): [("2", 2.5), ("1", 4.0)],
+        LeaderboardRepository.company_key(2): [("3", 3.0)],
+        "leaderboard:global": [("2", 2.5), ("3", 3.0), ("1", 4.5)],
+    }
+    assert REBUILD_KEY not in boards
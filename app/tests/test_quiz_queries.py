@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from models.Models import Quiz, Question, Option
+from repositories import quiz_cache_repository
+
+QUESTIONS = 10
+OPTIONS = 4
+
+
+@pytest.fixture
+def statements(engine, async_session, create_tables, no_redis):
+    create_tables(Quiz, Question, Option)
+
+    async def seed():
+        async with async_session() as session:
+            for quiz_id in (1, 2, 3):
+                quiz = Quiz(id=quiz_id, title=f"quiz {quiz_id}", description="test", frequency=1, company_id=1)
+                quiz.question = [
+                    Question(text=f"question {number}", option=[
+                        Option(text=f"option {number}.{option}", is_correct=option == 0) for option in range(OPTIONS)
+                    ])
+                    for number in range(QUESTIONS)
+                ]
+                session.add(quiz)
+            await session.commit()
+
+    asyncio.run(seed())
+
+    executed = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda connection, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+def test_get_quizzes_statement_count(statements, client):
+    response = client.get("/company/1/get-quizzes/")
+    assert response.status_code == 200
+    assert len(response.json()["quizzes"]) == 3
+    assert len(statements) == 1
+
+
+def test_get_questions_statement_count(statements, client):
+    response = client.get("/company/1/quiz/1/questions")
+    assert response.status_code == 200
+    questions = response.json()["questions"]
+    assert len(questions) == QUESTIONS
+    assert all(len(question["options"]) == OPTIONS for question in questions)
+    assert len(statements) == 3
+
+
+def test_questions_fall_back_to_postgres_when_cache_content_fails(statements, client, monkeypatch):
+    class BrokenContentRedis:
+        async def get(self, key):
+            if key.startswith("quiz_cache_version:"):
+                return "version"
+            raise ConnectionError("Redis dropped the connection")
+
+        async def set(self, *args, **kwargs):
+            raise ConnectionError("Redis dropped the connection")
+
+    async def broken_redis():
+        return BrokenContentRedis()
+
+    monkeypatch.setattr(quiz_cache_repository, "get_redis", broken_redis)
+    response = client.get("/company/1/quiz/1/questions")
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == QUESTIONS
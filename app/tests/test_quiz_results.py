@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.Models import QuizResult
+from repositories.quiz_result_repository import QuizResultRepository
+
+
+@pytest.fixture(autouse=True)
+def results(async_session, create_tables):
+    create_tables(QuizResult)
+    started = datetime(2023, 1, 1)
+
+    async def seed():
+        async with async_session() as session:
+            session.add_all([
+                QuizResult(id=user_id * 10 + attempt, company_id=1, user_id=user_id, quiz_id=1, questions=4,
+                           correct_answers=attempt, timestamp=started + timedelta(days=attempt))
+                for user_id in (1, 2, 3) for attempt in range(4)
+            ])
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+def test_users_averages_keyset_pages_match_single_page(async_session):
+    async def fetch(**kwargs):
+        async with async_session() as session:
+            return await QuizResultRepository(database=session).get_all_users_averages(company_id=1, **kwargs)
+
+    whole = asyncio.run(fetch(limit=100))
+    assert whole.next_cursor is None
+    assert len(whole.averages) == 12
+
+    paged, cursor = [], {}
+    while True:
+        page = asyncio.run(fetch(limit=5, **cursor))
+        paged.extend(page.averages)
+        if page.next_cursor is None:
+            break
+        cursor = {"after_user_id": page.next_cursor.user_id, "after_timestamp": page.next_cursor.timestamp,
+                  "after_id": page.next_cursor.id}
+    assert paged == whole.averages
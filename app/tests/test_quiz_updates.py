@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from models.Models import Quiz, Question, Option
+from repositories.quiz_due_repository import QuizDueRepository
+from repositories.quizzes_repository import QuizzRepository
+from schemas.Option import OptionTreeUpdateScheme
+from schemas.Question import QuestionTreeUpdateScheme
+from schemas.Quiz import QuizUpdateScheme
+
+
+@pytest.fixture(autouse=True)
+def quiz(async_session, create_tables, no_redis):
+    create_tables(Quiz, Question, Option)
+
+    async def seed():
+        async with async_session() as session:
+            quiz = Quiz(id=1, title="quiz", description="test", frequency=1, company_id=1)
+            quiz.question = [
+                Question(id=1, text="question 1", option=[
+                    Option(id=1, text="option 1.1", is_correct=True), Option(id=2, text="option 1.2")]),
+                Question(id=2, text="question 2", option=[
+                    Option(id=3, text="option 2.1", is_correct=True), Option(id=4, text="option 2.2")]),
+            ]
+            session.add(quiz)
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+def update_quiz(async_session, quiz: QuizUpdateScheme):
+    async def run():
+        async with async_session() as session:
+            return await QuizzRepository(database=session).update_quiz(quiz)
+
+    return asyncio.run(run())
+
+
+def test_update_quiz_reschedules_due_dates_on_frequency_change(async_session, monkeypatch):
+    rescheduled = []
+
+    async def reschedule_quiz(self, quiz_id, frequency):
+        rescheduled.append((quiz_id, frequency))
+
+    monkeypatch.setattr(QuizDueRepository, "reschedule_quiz", reschedule_quiz)
+    updated = update_quiz(async_session, QuizUpdateScheme(id=1, title="quiz", description="test", frequency=7,
+                                                          questions=[]))
+    assert updated.frequency == 7
+    assert rescheduled == [(1, 7)]
+
+
+def test_update_quiz_partial_payload_returns_whole_tree(async_session):
+    updated = update_quiz(async_session, QuizUpdateScheme(id=1, title="quiz", description="test", frequency=1, questions=[
+        QuestionTreeUpdateScheme(id=1, text="question 1 updated", options=[
+            OptionTreeUpdateScheme(id=1, text="option 1.1 updated", is_correct=True),
+            OptionTreeUpdateScheme(text="option 1.3", is_correct=False),
+        ]),
+        QuestionTreeUpdateScheme(text="question 3", options=[
+            OptionTreeUpdateScheme(text="option 3.1", is_correct=True),
+            OptionTreeUpdateScheme(text="option 3.2", is_correct=False),
+        ]),
+    ]))
+    tree = {question.text: [option.text for option in question.options] for question in updated.questions}
+    assert tree == {
+        "question 1 updated": ["option 1.1 updated", "option 1.2", "option 1.3"],
+        "question 2": ["option 2.1", "option 2.2"],
+        "question 3": ["option 3.1", "option 3.2"],
+    }
+
+    async def stored():
+        async with async_session() as session:
+            return await QuizzRepository(database=session).get_quiz_tree(1)
+
+    assert asyncio.run(stored()).questions == updated.questions
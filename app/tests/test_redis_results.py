@@ -0,0 +1,31 @@
+import asyncio
+
+from fakeredis import aioredis
+
+from repositories.redis_repository import RedisRepository
+
+
+def quiz_data(number: int) -> dict:
+    return {"user_id": 1, "company_id": 1, "quiz_id": number // 3, "question": f"question {number}",
+            "option": "option", "is_correct": "True", "time": "2023-01-01T00:00:00"}
+
+
+def test_iter_indexed_results_survives_pruning_during_export():
+    async def run():
+        redis_repository = RedisRepository(aioredis.FakeRedis(decode_responses=True))
+        for attempt in range(4):
+            await redis_repository.save_quiz_batch([quiz_data(attempt * 3 + number) for number in range(3)])
+
+        index_key = redis_repository.company_index_key(1)
+        first = await redis_repository.redis_client.zrange(index_key, 0, 0)
+        exported = []
+        async for result in redis_repository.iter_indexed_results(index_key, chunk_size=2):
+            exported.append(result["question"])
+            if len(exported) == 1:
+                # Pruning an entry the export has already read must not shift the following pages
+                await redis_repository.redis_client.zrem(index_key, *first)
+        return exported
+
+    exported = asyncio.run(run())
+    assert sorted(exported, key=lambda question: int(question.split()[1])) == [
+        f"question {number}" for number in range(12)]
@@ -0,0 +1,97 @@
+import asyncio
+from collections import OrderedDict
+
+import pytest
+from sqlalchemy import update
+
+from models.Models import Quiz, Question, Option
+from repositories import answer_key_repository
+from repositories.answer_key_repository import AnswerKeyRepository
+from repositories.quiz_cache_repository import QuizCacheRepository
+
+
+@pytest.fixture(autouse=True)
+def quiz(async_session, create_tables, no_redis, monkeypatch):
+    monkeypatch.setattr(answer_key_repository, "answer_key_cache", OrderedDict())
+    create_tables(Quiz, Question, Option)
+
+    async def seed():
+        async with async_session() as session:
+            quiz = Quiz(id=1, title="quiz", description="test", frequency=1, company_id=1)
+            quiz.question = [
+                Question(id=1, text="question 1", option=[
+                    Option(id=1, text="option 1.1", is_correct=True), Option(id=2, text="option 1.2")]),
+                Question(id=2, text="question 2", option=[
+                    Option(id=3, text="option 2.1", is_correct=True), Option(id=4, text="option 2.2")]),
+            ]
+            session.add(quiz)
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+class FakeRedis:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+
+def get_answer_key(async_session, redis_client):
+    async def run():
+        async with async_session() as session:
+            return await AnswerKeyRepository(database=session, redis_client=redis_client).get_answer_key(1)
+
+    return asyncio.run(run())
+
+
+def test_take_quiz_rejects_empty_submission(client):
+    response = client.post("/company/1/quiz/1/take-quiz", json={})
+    assert response.status_code == 400
+
+
+def test_take_quiz_rejects_partial_submission(client):
+    response = client.post("/company/1/quiz/1/take-quiz", json={"1": 1})
+    assert response.status_code == 400
+    assert "[2]" in response.json()["detail"]
+
+
+def test_take_quiz_rejects_quiz_of_another_company(client):
+    response = client.post("/company/2/quiz/1/take-quiz", json={"1": 1, "2": 3})
+    assert response.status_code == 404
+
+
+def test_answer_key_in_old_format_is_rebuilt(async_session):
+    redis_client = FakeRedis({
+        QuizCacheRepository.version_key("quiz", 1): "v1",
+        AnswerKeyRepository.answer_key_key(1, "v1"): '{"quiz_id": 1, "questions": [1, 2]}',
+    })
+    answer_key = get_answer_key(async_session, redis_client)
+    assert answer_key.correct == {1: {1}, 2: {3}}
+    assert redis_client.values[AnswerKeyRepository.answer_key_key(1, "v1")] == answer_key.model_dump_json()
+
+
+def test_answer_key_loaded_before_an_edit_is_not_served_after_it(async_session, monkeypatch):
+    redis_client = FakeRedis()
+    load_answer_key = AnswerKeyRepository.load_answer_key
+
+    async def load_then_edit(self, quiz_id):
+        answer_key = await load_answer_key(self, quiz_id)
+        # The edit commits and bumps the version after the stale key was read but before it is stored
+        async with async_session() as session:
+            await session.execute(update(Option).where(Option.question_id == 1).values(is_correct=Option.id == 2))
+            await session.commit()
+        await QuizCacheRepository(redis_client).bump("quiz", quiz_id)
+        monkeypatch.setattr(AnswerKeyRepository, "load_answer_key", load_answer_key)
+        return answer_key
+
+    monkeypatch.setattr(AnswerKeyRepository, "load_answer_key", load_then_edit)
+    assert get_answer_key(async_session, redis_client).correct[1] == {1}
+    assert get_answer_key(async_session, redis_client).correct[1] == {2}
@@ -0,0 +1,9 @@
+from fastapi import HTTPException
+
+
+def check_cursor(**cursor):
+    # Keyset cursors only make sense complete, a partial one would silently restart from the beginning
+    given = [name for name, value in cursor.items() if value is not None]
+    if given and len(given) != len(cursor):
+        missing = sorted(cursor.keys() - set(given))
+        raise HTTPException(status_code=400, detail=f"Cursor is incomplete, missing {', '.join(missing)}")